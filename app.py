@@ -1,40 +1,61 @@
-import streamlit as st
-import pandas as pd
-import threading
 import time
-import io
-import traceback
-from datetime import datetime
-import numpy as np
-import pickle
+
+_rerun_start = time.perf_counter()
+
+import streamlit as st
+import os
+import tempfile
+from datetime import datetime, timedelta
 from database import (
     init_db, get_potential_alerts, update_alert_status, 
-    register_user, get_alert_by_id
+    register_user, get_alert_by_id, search_alerts, has_alert_search
 )
-from twitter_stream import create_twitter_stream_thread
-from notification import notify_users_in_radius
-from opencage.geocoder import OpenCageGeocode
-from opencage.geocoder import InvalidInputError, RateLimitExceededError, UnknownError
-from twilio.rest import Client
+from notification import get_scheduler, schedule_notifications
+from model_store import get_model, has_model_files
+from feedback_learner import start_feedback_learner
+from stream_manager import get_stream_supervisor
+from retention import get_alerts, search_archive, start_retention_worker
+from burst_detector import HOT_RATIO, geohash_encode, get_burst_detector
+from utils import get_crisis_keywords
+from profiling import PROFILE_LOG_PATH, finish_rerun, profiling_requested, section, start_rerun
 
-print("Application starting")
+# Heavy dependencies (pandas, numpy, tweepy, opencage, twilio, sklearn) are
+# imported inside the tabs and actions that use them, because Streamlit
+# re-executes this script on every interaction.
 
-# Initialize the database
-init_db()
-print("Database initialized")
+print("Application starting")
 
 # Page configuration
 st.set_page_config(page_title="Crisis Alert System", layout="wide")
 print("Streamlit page configured")
 
+# Opt-in profiling of this rerun: sidebar switch, or CRISIS_ALERT_PROFILE=1 to default it on
+if st.session_state.get('profile_reruns', profiling_requested()):
+    start_rerun(_rerun_start, use_cprofile=st.session_state.get('profile_cprofile', False))
+
+@st.cache_resource(show_spinner=False)
+def initialize_app():
+    """One-time process initialization: database schema and background workers"""
+    start = time.perf_counter()
+    init_db()
+    print("Database initialized")
+    # Fold operator confirm/dismiss decisions into the model in the background
+    start_feedback_learner()
+    # Periodically move old and reviewed alerts out of the hot table
+    start_retention_worker()
+    # Seed burst detection baselines from the last day of stream alerts;
+    # test alerts are inserted as 'pending' and must not inflate them
+    get_burst_detector().warm_from_alerts(
+        get_alerts(status='potential', since=datetime.now() - timedelta(days=1)), get_crisis_keywords()
+    )
+    return {'initialized_at': datetime.now(), 'init_seconds': time.perf_counter() - start,
+            'alert_search': has_alert_search()}
+
+with section("initialize_app"):
+    app_state = initialize_app()
+
 def initialize_session_state():
     """Initialize session state variables"""
-    if 'twitter_stream_active' not in st.session_state:
-        st.session_state.twitter_stream_active = False
-    if 'twitter_thread' not in st.session_state:
-        st.session_state.twitter_thread = None
-    if 'twitter_stop_event' not in st.session_state:
-        st.session_state.twitter_stop_event = None
     if 'selected_location' not in st.session_state:
         st.session_state.selected_location = {"lat": 22.5726459, "lon": 88.3638953}
     if 'location_selected' not in st.session_state:
@@ -63,14 +84,8 @@ def initialize_session_state():
 initialize_session_state()
 
 def start_twitter_stream():
-    """Start the Twitter streaming thread"""
-    if not st.session_state.twitter_stream_active:
-        print("Starting Twitter stream")
-        thread, stop_event = create_twitter_stream_thread()
-        thread.start()
-        st.session_state.twitter_thread = thread
-        st.session_state.twitter_stop_event = stop_event
-        st.session_state.twitter_stream_active = True
+    """Start the shared Twitter stream worker"""
+    if get_stream_supervisor().start():
         print("Twitter stream started successfully")
         st.success("Twitter stream started!")
     else:
@@ -78,11 +93,8 @@ def start_twitter_stream():
         st.info("Twitter stream is already running.")
 
 def stop_twitter_stream():
-    """Stop the Twitter streaming thread"""
-    if st.session_state.twitter_stream_active and st.session_state.twitter_stop_event:
-        print("Stopping Twitter stream")
-        st.session_state.twitter_stop_event.set()
-        st.session_state.twitter_stream_active = False
+    """Stop the shared Twitter stream worker"""
+    if get_stream_supervisor().stop():
         print("Twitter stream stopped successfully")
         st.success("Twitter stream stopped!")
     else:
@@ -104,15 +116,16 @@ def confirm_alert(alert_id):
             print(f"Alert {alert_id} status updated to 'confirmed'")
             
             alert['text'] = st.session_state.editing_alert_text
-            notification_results = notify_users_in_radius(alert)
-            st.session_state.notification_results = notification_results
-            print(f"Sent {len(notification_results)} notifications for alert {alert_id} with edited message")
+            # Delivery runs in the background, nearest subscribers first
+            notification_job = schedule_notifications(alert)
+            st.session_state.notification_job = notification_job
+            print(f"Queued {notification_job.total} notifications for alert {alert_id} with edited message")
             
             st.session_state.edit_mode = False
             st.session_state.editing_alert_id = None
             st.session_state.editing_alert_text = ""
             
-            st.success(f"Alert confirmed! Sent {len(notification_results)} notifications.")
+            st.success(f"Alert confirmed! Queued {notification_job.total} notifications, nearest first.")
             st.rerun()
     else:
         print(f"Failed to confirm alert: Alert with ID {alert_id} not found")
@@ -125,15 +138,22 @@ def dismiss_alert(alert_id):
     print(f"Alert {alert_id} status updated to 'dismissed'")
     st.success("Alert dismissed!")
 
+@st.cache_resource(show_spinner=False)
+def get_geocoder():
+    """Create the OpenCage client once per process"""
+    from opencage.geocoder import OpenCageGeocode
+    return OpenCageGeocode(st.secrets["OpenCage"]["api_key"])
+
 def geocode_address(address):
     """Convert address to geocoordinates using OpenCage API"""
+    from opencage.geocoder import InvalidInputError, RateLimitExceededError
     print(f"Geocoding address: {address}")
     
-    key = st.secrets["OpenCage"]["api_key"]
-    geocoder = OpenCageGeocode(key)
+    geocoder = get_geocoder()
     
     try:
-        results = geocoder.geocode(address)
+        with section("geocode"):
+            results = geocoder.geocode(address)
         if results and len(results):
             result = results[0]
             lat = result['geometry']['lat']
@@ -173,13 +193,11 @@ def geocode_address(address):
 
 def load_model():
     """Load the disaster prediction model and vectorizer"""
-    try:
-        model = pickle.load(open('model.pkl', 'rb'))
-        vectorizer = pickle.load(open('vectorizer.pkl', 'rb'))
-        return model, vectorizer
-    except (FileNotFoundError, pickle.UnpicklingError):
+    with section("load_model"):
+        model, vectorizer = get_model()
+    if model is None:
         st.warning("Model files not found or corrupted.")
-        return None, None
+    return model, vectorizer
 
 def check_tweet(text, model, vectorizer):
     """Predict if a tweet is about a disaster"""
@@ -205,6 +223,12 @@ st.sidebar.title("Crisis Alert System")
 st.sidebar.header("Navigation")
 page = st.sidebar.radio("Go to", ["Dashboard", "User Registration"])
 
+st.sidebar.checkbox("Profile reruns", value=profiling_requested(), key="profile_reruns",
+                    help="Time each section and database query of every rerun")
+if st.session_state.profile_reruns:
+    st.sidebar.checkbox("Capture cProfile", value=False, key="profile_cprofile",
+                        help="Also record every function call (slows reruns down)")
+
 if page == "Dashboard":
     st.title("Crisis Alert Dashboard")
     
@@ -216,10 +240,21 @@ if page == "Dashboard":
         if st.button("Stop Stream", key="stop_stream"):
             stop_twitter_stream()
     
-    if not st.session_state.twitter_stream_active:
+    stream_status = get_stream_supervisor().status()
+    if not stream_status['running']:
         st.warning("Twitter stream is not active. Start the stream to monitor for crisis events or enter a test tweet to check functionality.")
+        if stream_status['last_error']:
+            st.caption(f"Last stream error: {stream_status['last_error']}")
     else:
-        st.success("Twitter stream is active and monitoring for potential crises.")
+        st.success(f"Twitter stream is active and monitoring for potential crises (since {stream_status['started_at']:%H:%M:%S}).")
+        stat_col1, stat_col2, stat_col3, stat_col4 = st.columns(4)
+        stat_col1.metric("Tweets / min", f"{stream_status['tweets_per_minute']:.1f}")
+        stat_col2.metric("Tweets seen", stream_status['tweets_seen'])
+        stat_col3.metric("Alerts created", stream_status['alerts_inserted'])
+        stat_col4.metric("Reconnects", stream_status['reconnects'])
+        if stream_status['model_errors']:
+            st.caption(f"{stream_status['model_errors']} matches were queued without a model label "
+                       "because the model failed to classify them")
     
     dashboard_tab1, dashboard_tab2, dashboard_tab3 = st.tabs(["Potential Alerts", "Create Test Alert", "Test Tweet"])
     
@@ -269,18 +304,88 @@ if page == "Dashboard":
                 st.session_state.editing_alert_id = None
                 st.rerun()
         else:
+            search_col1, search_col2, search_col3 = st.columns([3, 2, 1])
+            with search_col1:
+                search_query = st.text_input("Search alerts", placeholder="e.g., flood bridge", key="alert_search")
+            with search_col2:
+                search_statuses = st.multiselect(
+                    "Status", ["potential", "pending", "confirmed", "dismissed"],
+                    default=["potential", "pending"], key="alert_search_status"
+                )
+            with search_col3:
+                search_window = st.selectbox("Time", ["Any time", "24 hours", "7 days", "30 days"], key="alert_search_window")
+            
+            search_archived = st.checkbox(
+                "Include archive", key="alert_search_archive",
+                help="Confirmed and dismissed alerts move to the archive after a day; "
+                     "archived months are scanned without the full-text index"
+            )
+            if not app_state['alert_search']:
+                st.warning("Full-text search is unavailable (this SQLite has no FTS5), "
+                           "so only archived alerts can be searched.")
+            
+            if search_query:
+                window_days = {"24 hours": 1, "7 days": 7, "30 days": 30}.get(search_window)
+                since = datetime.now() - timedelta(days=window_days) if window_days else None
+                results = search_alerts(search_query, status=search_statuses or None, since=since)
+                if search_archived:
+                    results += search_archive(search_query, status=search_statuses or None, since=since)
+                    st.caption(f"{len(results)} matching alerts")
+                else:
+                    st.caption(f"{len(results)} matching alerts among active alerts. "
+                               "Reviewed alerts older than a day are archived; tick Include archive to search them.")
+                for result in results:
+                    archived = " (archived)" if result.get('archived') else ""
+                    model_note = " (model: not a disaster)" if result.get('model_label') == 0 else ""
+                    st.write(f"**#{result['id']}** [{result['status']}{archived}] {result['time']} - "
+                             f"{result['text']}{model_note}")
+                st.write("---")
+            
+            detector = get_burst_detector()
             alerts = get_potential_alerts()
+            order_by_hotness = st.toggle("Prioritize hot regions", value=True, key="order_by_hotness",
+                                         help="Order alerts by how far their area's tweet rate exceeds its baseline")
+            if order_by_hotness:
+                with section("prioritize_alerts"):
+                    alerts = detector.prioritize_alerts(alerts)
+            # Matches the classifier rejected stay reviewable, after the rest
+            alerts.sort(key=lambda alert: alert.get('model_label') == 0)
+            
+            with section("hot_regions"):
+                hot_regions = detector.hot_regions(limit=5, keywords=get_crisis_keywords())
+            if hot_regions:
+                st.subheader("Hot Regions")
+                for region in hot_regions:
+                    top_keywords = ", ".join(
+                        f"{keyword} ({count})" for keyword, count in
+                        sorted(region['keywords'].items(), key=lambda item: item[1], reverse=True)[:3]
+                    )
+                    st.write(f"🔥 **{region['cell']}** near Lat {region['lat']:.3f}, Lon {region['lon']:.3f}: "
+                             f"{region['window_count']} tweets in window, {region['score']:.1f}x baseline"
+                             + (f" - {top_keywords}" if top_keywords else ""))
             
             if alerts:
-                map_data = pd.DataFrame({
-                    'lat': [alert['lat'] for alert in alerts],
-                    'lon': [alert['lon'] for alert in alerts]
-                })
+                with section("map DataFrame build"):
+                    import pandas as pd
+                    hotness = [alert['hotness'] if 'hotness' in alert
+                               else detector.cell_score(geohash_encode(alert['lat'], alert['lon']))[1]
+                               for alert in alerts]
+                    map_data = pd.DataFrame({
+                        'lat': [alert['lat'] for alert in alerts] + [region['lat'] for region in hot_regions],
+                        'lon': [alert['lon'] for alert in alerts] + [region['lon'] for region in hot_regions],
+                        'color': ['#ff4b4b' if score >= HOT_RATIO else '#1f77b4' for score in hotness]
+                                 + ['#ff8c00'] * len(hot_regions),
+                        'size': [100 + 100 * min(score, 10) for score in hotness]
+                                + [2500] * len(hot_regions),
+                    })
                 
-                st.map(map_data)
+                with section("st.map"):
+                    st.map(map_data, color='color', size='size')
                 
-                for alert in alerts:
-                    with st.expander(f"Alert ID: {alert['id']} - {alert['text'][:50]}..."):
+                for alert, score in zip(alerts, hotness):
+                    hot_marker = "🔥 " if score >= HOT_RATIO else ""
+                    model_note = " (model: not a disaster)" if alert.get('model_label') == 0 else ""
+                    with st.expander(f"{hot_marker}Alert ID: {alert['id']} - {alert['text'][:50]}...{model_note}"):
                         st.write(f"**Text:** {alert['text']}")
                         st.write(f"**Location:** Lat {alert['lat']:.6f}, Lon {alert['lon']:.6f}")
                         st.write(f"**Time:** {alert['time']}")
@@ -296,12 +401,29 @@ if page == "Dashboard":
             else:
                 st.info("No potential crisis alerts to review at this time.")
         
-        if 'notification_results' in st.session_state and st.session_state.notification_results:
+        if 'notification_job' in st.session_state and st.session_state.notification_job:
+            notification_job = st.session_state.notification_job
             st.header("Notification Results")
-            for result in st.session_state.notification_results:
+            attempted, total = notification_job.progress()
+            st.progress(attempted / total if total else 1.0,
+                        text=f"Alert {notification_job.alert_id}: {attempted} of {total} notifications attempted")
+            if not notification_job.is_done():
+                st.caption(f"{get_scheduler().pending()} sends queued across all alerts. Refresh to update.")
+            for result in list(notification_job.results):
                 success, user_id, message = result
                 status = "✅ Sent" if success else "❌ Failed"
                 st.write(f"{status} - User ID: {user_id}, Message ID: {message}")
+            
+            delivery_report = get_scheduler().report()
+            if delivery_report:
+                st.subheader("Time to notify by distance")
+                st.dataframe([{
+                    'Distance': row['band'],
+                    'Delivered': row['delivered'],
+                    'p50 (s)': round(row['p50_seconds'], 1),
+                    'p90 (s)': round(row['p90_seconds'], 1),
+                    'p99 (s)': round(row['p99_seconds'], 1),
+                } for row in delivery_report], hide_index=True)
     
     with dashboard_tab2:
         st.header("Test SMS Notification System")
@@ -341,7 +463,7 @@ if page == "Dashboard":
                             st.error("Could not geocode that address. Using default coordinates.")
                 
                 import sqlite3
-                from datetime import datetime
+                from datetime import datetime, timedelta
                 
                 conn = sqlite3.connect('crisis_alerts.db')
                 cursor = conn.cursor()
@@ -369,9 +491,8 @@ if page == "Dashboard":
         You can use it to test how the system detects crisis-related content.
         """)
         
-        model, vectorizer = load_model()
-        
-        if model is not None and vectorizer is not None:
+        # The model (and sklearn) is only loaded once a tweet or file is actually classified
+        if has_model_files():
             if st.session_state.tweet_is_disaster:
                 st.success("✅ Tweet classified as a potential disaster. Please specify location:")
                 
@@ -430,7 +551,7 @@ if page == "Dashboard":
                         test_lon = st.session_state.test_tweet_lon
                         
                         import sqlite3
-                        from datetime import datetime
+                        from datetime import datetime, timedelta
                         
                         conn = sqlite3.connect('crisis_alerts.db')
                         cursor = conn.cursor()
@@ -462,8 +583,38 @@ if page == "Dashboard":
                 
                 if st.button('Analyze Tweet', type="primary"):
                     with st.spinner("Analyzing..."):
-                        check_tweet(user_input, model, vectorizer)
+                        model, vectorizer = load_model()
+                        if model is not None:
+                            check_tweet(user_input, model, vectorizer)
                         st.rerun()
+
+            st.subheader("Batch Classification")
+            st.write("Upload a CSV export with a `text` column (the tweets.csv schema) to score every row.")
+            uploaded_file = st.file_uploader("Tweets CSV", type=["csv"], key="batch_csv")
+            if uploaded_file is not None and st.button("Classify File", key="classify_file"):
+                from batch_classify import classify_csv
+                progress_text = st.empty()
+                model, vectorizer = load_model()
+                if model is not None:
+                    # A private file per run, so concurrent sessions never share results
+                    fd, output_path = tempfile.mkstemp(prefix="classified_", suffix=".csv")
+                    os.close(fd)
+                    try:
+                        stats = classify_csv(
+                            uploaded_file, output_path, model, vectorizer,
+                            progress=lambda rows: progress_text.write(f"Classified {rows} rows...")
+                        )
+                        with open(output_path, 'rb') as f:
+                            results_csv = f.read()
+                    except ValueError as e:
+                        st.error(f"Could not classify file: {e}")
+                    else:
+                        st.success(f"Classified {stats['rows']} rows ({stats['disaster_rows']} likely disasters) "
+                                   f"in {stats['seconds']:.2f}s, {stats['rows_per_second']:.0f} rows/s")
+                        st.download_button("Download Results", results_csv,
+                                           file_name=f"classified_{uploaded_file.name}", mime="text/csv")
+                    finally:
+                        os.remove(output_path)
         else:
             st.error("Model not loaded. Please ensure model.pkl and vectorizer.pkl files are available in the application directory.")
 
@@ -590,6 +741,8 @@ elif page == "User Registration":
                 st.rerun()
                 
         with col2:
+            import numpy as np
+            import pandas as pd
             approx_degree_per_km = 0.01 / 1.11
             radius_in_degrees = radius * approx_degree_per_km
             
@@ -602,7 +755,8 @@ elif page == "User Registration":
                 'lon': np.append(circle_lon, st.session_state.selected_location['lon'])
             })
             
-            st.map(circle_df)
+            with section("st.map"):
+                st.map(circle_df)
             st.caption(f"The red circle represents approximately {radius} km radius around your location")
     
     elif current_step == 3:
@@ -666,6 +820,20 @@ elif page == "User Registration":
     
     print("User Registration page accessed")
 
+rerun_profile = finish_rerun(page)
+if rerun_profile is not None:
+    with st.sidebar.expander("Rerun profile", expanded=True):
+        st.caption(f"Rerun took {rerun_profile.total_seconds * 1000:.0f} ms (logged to {PROFILE_LOG_PATH})")
+        st.dataframe(rerun_profile.breakdown(), hide_index=True)
+        cprofile_report = rerun_profile.cprofile_report()
+        if cprofile_report:
+            st.code(cprofile_report)
+
+# First render covers imports, one-time initialization and the first page build
+if 'first_render_seconds' not in app_state:
+    app_state['first_render_seconds'] = time.perf_counter() - _rerun_start
+    print(f"First render completed in {app_state['first_render_seconds'] * 1000:.0f} ms")
+
 # Run the app
 if __name__ == "__main__":
     print("Main application started")
\ No newline at end of file
@@ -0,0 +1,78 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNKSIZE = 5000
+
+def score_texts(model, vectorizer, texts):
+    """
+    Classify a batch of texts
+    Returns (predictions, scores); scores are decision values, or None if the model has none
+    """
+    X = vectorizer.transform(texts)
+    predictions = np.asarray(model.predict(X))
+    scores = None
+    if hasattr(model, 'decision_function'):
+        scores = np.asarray(model.decision_function(X), dtype=float)
+    return predictions, scores
+
+def classify_csv(input_file, output_file, model, vectorizer,
+                 chunksize=DEFAULT_CHUNKSIZE, text_column='text', progress=None):
+    """
+    Stream a CSV (tweets.csv schema) in chunks, classify each chunk and append
+    the rows with prediction and score columns to output_file, so files larger
+    than memory can be scored. progress, if given, is called with the row count
+    after every chunk.
+    Returns a dict with rows, seconds and rows_per_second
+    """
+    start = time.perf_counter()
+    rows = 0
+    positives = 0
+    for i, chunk in enumerate(pd.read_csv(input_file, chunksize=chunksize)):
+        if text_column not in chunk.columns:
+            raise ValueError(f"Input has no '{text_column}' column")
+        texts = chunk[text_column].fillna('').astype(str).tolist()
+        predictions, scores = score_texts(model, vectorizer, texts)
+        chunk['prediction'] = predictions
+        chunk['score'] = scores if scores is not None else np.nan
+        chunk.to_csv(output_file, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+
+        rows += len(chunk)
+        positives += int(np.sum(predictions == 1))
+        if progress is not None:
+            progress(rows)
+
+    seconds = time.perf_counter() - start
+    return {
+        'rows': rows,
+        'disaster_rows': positives,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds > 0 else 0.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify every tweet in a CSV file")
+    parser.add_argument('input', help="CSV file with a text column")
+    parser.add_argument('output', help="CSV file to write with prediction and score columns")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help="Rows per chunk")
+    parser.add_argument('--text-column', default='text', help="Name of the column to classify")
+    args = parser.parse_args()
+
+    from model_store import get_model
+    model, vectorizer = get_model()
+    if model is None:
+        parser.error("No model available. Train one with train_model.py first.")
+
+    stats = classify_csv(
+        args.input, args.output, model, vectorizer,
+        chunksize=args.chunksize,
+        text_column=args.text_column,
+        progress=lambda rows: print(f"Classified {rows} rows"),
+    )
+    print(f"Classified {stats['rows']} rows ({stats['disaster_rows']} disaster) "
+          f"in {stats['seconds']:.2f}s, {stats['rows_per_second']:.0f} rows/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import database
+import synthetic
+
+RESULTS_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'results')
+DEFAULT_SCALES = [100, 1000, 10000]
+REGRESSION_THRESHOLD = 1.2
+
+BENCHMARKS = {}
+
+def benchmark(name):
+    """
+    Register a benchmark. The decorated function receives (scale, work_dir),
+    does its setup and returns (run, ops): run() executes the hot path once and
+    processes ops items.
+    """
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+def _use_db(work_dir, scale, subscribers=0, alerts=0):
+    database.DB_PATH = os.path.join(work_dir, f"bench_{scale}.db")
+    if os.path.exists(database.DB_PATH):
+        os.remove(database.DB_PATH)
+    database.init_db()
+    conn = sqlite3.connect(database.DB_PATH)
+    if subscribers:
+        conn.executemany(
+            "INSERT INTO subscriptions (phone, lat, lon, radius) VALUES (?, ?, ?, ?)",
+            synthetic.make_subscribers(subscribers)
+        )
+    if alerts:
+        statuses = ['potential', 'pending', 'confirmed', 'dismissed']
+        conn.executemany(
+            "INSERT INTO alerts (text, lat, lon, time, status) VALUES (?, ?, ?, ?, ?)",
+            [(text, lat, lon, datetime.now(), statuses[i % len(statuses)])
+             for i, (text, lat, lon) in enumerate(synthetic.make_alerts(alerts))]
+        )
+    conn.commit()
+    conn.close()
+
+@benchmark('haversine_distance')
+def bench_haversine(scale, work_dir):
+    from utils import haversine_distance
+    points = [(lat, lon) for _, lat, lon, _ in synthetic.make_subscribers(scale)]
+    center = synthetic.CENTER
+
+    def run():
+        for lat, lon in points:
+            haversine_distance(lat, lon, center[0], center[1])
+    return run, scale
+
+@benchmark('is_user_in_radius')
+def bench_in_radius(scale, work_dir):
+    from utils import is_user_in_radius
+    subscribers = synthetic.make_subscribers(scale)
+    center = synthetic.CENTER
+
+    def run():
+        for _, lat, lon, radius in subscribers:
+            is_user_in_radius(lat, lon, center[0], center[1], radius)
+    return run, scale
+
+@benchmark('stream_keyword_filter')
+def bench_keyword_filter(scale, work_dir):
+    import threading
+    import twitter_stream
+    from utils import get_crisis_keywords
+
+    # Measure the filter itself: no database writes and no model
+    twitter_stream.insert_alert = lambda text, lat, lon, model_label=None: None
+    twitter_stream.predict_text = lambda text: None
+    stream = twitter_stream.CrisisStream.__new__(twitter_stream.CrisisStream)
+    stream.crisis_keywords = get_crisis_keywords()
+    stream.stop_event = threading.Event()
+    stream.stats = None
+    tweets = synthetic.make_tweets(scale)
+
+    def run():
+        for tweet in tweets:
+            stream.on_tweet(tweet)
+    return run, scale
+
+@benchmark('burst_detector_observe')
+def bench_burst_observe(scale, work_dir):
+    from burst_detector import BurstDetector
+    detector = BurstDetector()
+    tweets = synthetic.make_tweets(scale, seed=2, crisis_ratio=1.0, geo_ratio=1.0)
+    keywords = synthetic.get_crisis_keywords()
+    observations = []
+    for tweet in tweets:
+        lon, lat = tweet.geo['coordinates']['coordinates']
+        observations.append((lat, lon, [k for k in keywords if k in tweet.text]))
+
+    def run():
+        for lat, lon, matched in observations:
+            detector.observe(lat, lon, matched)
+    return run, scale
+
+@benchmark('insert_alert')
+def bench_insert_alert(scale, work_dir):
+    _use_db(work_dir, scale, alerts=scale)
+    rows = synthetic.make_alerts(min(scale, 500), seed=1)
+
+    def run():
+        for text, lat, lon in rows:
+            database.insert_alert(text, lat, lon)
+    return run, len(rows)
+
+@benchmark('get_potential_alerts')
+def bench_get_potential_alerts(scale, work_dir):
+    _use_db(work_dir, scale, alerts=scale)
+
+    def run():
+        database.get_potential_alerts()
+    return run, 1
+
+@benchmark('search_alerts')
+def bench_search_alerts(scale, work_dir):
+    _use_db(work_dir, scale, alerts=scale)
+
+    def run():
+        database.search_alerts("flood bridge", status=['potential', 'pending'])
+    return run, 1
+
+@benchmark('classify_tweet')
+def bench_classify(scale, work_dir):
+    model, vectorizer = _load_benchmark_model()
+    texts = [tweet.text for tweet in synthetic.make_tweets(scale, geo_ratio=0)]
+
+    # check_tweet classifies one text per call
+    def run():
+        for text in texts:
+            model.predict(vectorizer.transform([text]))[0]
+    return run, scale
+
+@benchmark('notify_users_in_radius')
+def bench_notify(scale, work_dir):
+    import notification
+    _use_db(work_dir, scale, subscribers=scale)
+    notification.send_sms = lambda to_number, message: (True, 'SM-benchmark')
+    # Time matching and scheduling, not the provider rate limit
+    notification.get_scheduler().set_rate(None)
+    alert = {'id': 1, 'text': synthetic.make_text(random.Random(0)),
+             'lat': synthetic.CENTER[0], 'lon': synthetic.CENTER[1]}
+
+    def run():
+        notification.notify_users_in_radius(dict(alert))
+    return run, scale
+
+@benchmark('subscriber_store_refresh')
+def bench_subscriber_refresh(scale, work_dir):
+    from subscriber_store import SubscriberStore
+    _use_db(work_dir, scale, subscribers=scale)
+    new_rows = synthetic.make_subscribers(100, seed=3)
+
+    # Each run adds 100 subscriptions and refreshes incrementally
+    def run():
+        store = run.store
+        conn = sqlite3.connect(database.DB_PATH)
+        conn.executemany(
+            "INSERT INTO subscriptions (phone, lat, lon, radius) VALUES (?, ?, ?, ?)",
+            [(f"+1666{run.batch:04d}{i:03d}", lat, lon, radius)
+             for i, (_, lat, lon, radius) in enumerate(new_rows)]
+        )
+        conn.commit()
+        conn.close()
+        run.batch += 1
+        store.refresh()
+    run.store = SubscriberStore()
+    run.store.refresh()
+    run.batch = 0
+    return run, 100
+
+_model_cache = {}
+
+def _load_benchmark_model():
+    """Use the installed model when it works here, otherwise a quick hashing model"""
+    if 'model' not in _model_cache:
+        from model_store import load_model_files
+        cwd = os.getcwd()
+        os.chdir(REPO_ROOT)
+        source = 'installed'
+        try:
+            model, vectorizer = load_model_files()
+            if model is not None:
+                model.predict(vectorizer.transform(["flood warning downtown"]))
+        except Exception as e:
+            print(f"Installed model unusable here ({e}); using a hashing model")
+            model = None
+        finally:
+            os.chdir(cwd)
+        if model is None:
+            from online_model import train_online_model
+            model, vectorizer, _ = train_online_model(os.path.join(REPO_ROOT, 'tweets.csv'), epochs=1)
+            source = 'hashing fallback trained for the benchmark'
+        _model_cache['model'] = (model, vectorizer)
+        # classify_tweet timings are only comparable between runs of the same model
+        _model_cache['info'] = {
+            'model': f"{type(model).__module__}.{type(model).__name__}",
+            'kernel': getattr(model, 'kernel', None),
+            'vectorizer': f"{type(vectorizer).__module__}.{type(vectorizer).__name__}",
+            'source': source,
+        }
+    return _model_cache['model']
+
+def time_benchmark(func, scale, work_dir, repeat):
+    """Run one benchmark at one scale and summarize its timings"""
+    run, ops = func(scale, work_dir)
+    samples = []
+    # Hot paths print progress lines; keep them out of the report
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        run()  # warm-up
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            samples.append(time.perf_counter() - start)
+    median = statistics.median(samples)
+    return {
+        'ops': ops,
+        'min_seconds': min(samples),
+        'median_seconds': median,
+        'mean_seconds': statistics.fmean(samples),
+        'ops_per_second': ops / median if median > 0 else None,
+    }
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def run_benchmarks(names, scales, repeat):
+    """Run the selected benchmarks at every scale; returns the results document"""
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name in names:
+            results[name] = {}
+            for scale in scales:
+                stats = time_benchmark(BENCHMARKS[name], scale, work_dir, repeat)
+                results[name][str(scale)] = stats
+                print(f"{name:<28} n={scale:<7} median {stats['median_seconds'] * 1000:10.2f} ms"
+                      f"  {stats['ops_per_second'] or 0:12.0f} ops/s")
+    return {
+        'commit': _git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'repeat': repeat,
+        'model': _model_cache.get('info'),
+        'results': results,
+    }
+
+def compare_results(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """Print median-time ratios against a baseline; returns the regressed entries"""
+    regressions = []
+    print(f"\nComparison with {baseline.get('commit')} ({baseline.get('timestamp')}):")
+    model_changed = baseline.get('model') != current.get('model')
+    for name, by_scale in current['results'].items():
+        if name == 'classify_tweet' and model_changed:
+            print(f"{name:<28} skipped: benchmark model differs from the baseline's (see 'model')")
+            continue
+        for scale, stats in by_scale.items():
+            old = baseline.get('results', {}).get(name, {}).get(scale)
+            if not old:
+                continue
+            ratio = stats['median_seconds'] / old['median_seconds'] if old['median_seconds'] else float('inf')
+            flag = "REGRESSION" if ratio > threshold else ""
+            print(f"{name:<28} n={scale:<7} {ratio:6.2f}x {flag}")
+            if flag:
+                regressions.append((name, scale, ratio))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the crisis alert hot paths")
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help="Benchmarks to run")
+    parser.add_argument('--scales', type=lambda v: [int(x) for x in v.split(',')],
+                        default=DEFAULT_SCALES, help="Comma-separated data sizes")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed runs per benchmark and scale")
+    parser.add_argument('--output', help="Results JSON path (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument('--compare', help="Baseline results JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help="Median-time ratio above which a result counts as a regression")
+    args = parser.parse_args()
+
+    document = run_benchmarks(args.only or list(BENCHMARKS), args.scales, args.repeat)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{document['commit']}.json")
+    with open(output, 'w') as f:
+        json.dump(document, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare_results(baseline, document, args.threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
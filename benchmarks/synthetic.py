@@ -0,0 +1,58 @@
+import math
+import random
+from types import SimpleNamespace
+
+from utils import get_crisis_keywords
+
+CENTER = (22.5726459, 88.3638953)
+
+_FILLER_WORDS = [
+    "the", "city", "people", "today", "near", "road", "river", "school", "market",
+    "news", "update", "watch", "photo", "morning", "night", "traffic", "bridge",
+    "station", "please", "share", "stay", "home", "everyone", "report", "local",
+]
+
+def random_point(rng, center=CENTER, spread_km=50):
+    """Return a (lat, lon) uniformly spread within spread_km of center"""
+    distance = spread_km * math.sqrt(rng.random())
+    bearing = rng.uniform(0, 2 * math.pi)
+    lat = center[0] + (distance / 111.0) * math.cos(bearing)
+    lon = center[1] + (distance / (111.0 * math.cos(math.radians(center[0])))) * math.sin(bearing)
+    return lat, lon
+
+def make_text(rng, crisis=True, words=15):
+    """Return a tweet-like text, optionally containing a crisis keyword"""
+    tokens = [rng.choice(_FILLER_WORDS) for _ in range(words)]
+    if crisis:
+        tokens.insert(rng.randrange(len(tokens)), rng.choice(get_crisis_keywords()))
+    return " ".join(tokens)
+
+def make_subscribers(n, seed=0, spread_km=50):
+    """Return n subscription rows (phone, lat, lon, radius)"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        lat, lon = random_point(rng, spread_km=spread_km)
+        rows.append((f"+1555{i:07d}", lat, lon, float(rng.randint(1, 100))))
+    return rows
+
+def make_alerts(n, seed=0, spread_km=50):
+    """Return n alert rows (text, lat, lon)"""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        lat, lon = random_point(rng, spread_km=spread_km)
+        rows.append((make_text(rng), lat, lon))
+    return rows
+
+def make_tweets(n, seed=0, crisis_ratio=0.2, geo_ratio=0.5):
+    """Return n objects shaped like tweepy tweets (text and geo attributes)"""
+    rng = random.Random(seed)
+    tweets = []
+    for _ in range(n):
+        geo = None
+        if rng.random() < geo_ratio:
+            lat, lon = random_point(rng)
+            geo = {'coordinates': {'type': 'Point', 'coordinates': [lon, lat]}}
+        tweets.append(SimpleNamespace(text=make_text(rng, crisis=rng.random() < crisis_ratio), geo=geo))
+    return tweets
@@ -0,0 +1,271 @@
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+
+from text_processing import normalize_text
+
+GEOHASH_PRECISION = 5          # cells of roughly 5 x 5 km
+BUCKET_SECONDS = 60
+WINDOW_BUCKETS = 15            # sliding window of 15 one-minute buckets
+BASELINE_ALPHA = 0.02          # EWMA weight of each completed bucket
+MAX_CELLS = 10000
+SKETCH_WIDTH = 2048
+SKETCH_DEPTH = 4
+HOT_MIN_COUNT = 3
+HOT_RATIO = 3.0
+
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+def geohash_encode(lat, lon, precision=GEOHASH_PRECISION):
+    """Encode a coordinate as a geohash string"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        value_range, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (value_range[0] + value_range[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            value_range[0] = mid
+        else:
+            bits <<= 1
+            value_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+def geohash_decode(cell):
+    """Return the (lat, lon) center of a geohash cell"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in cell:
+        bits = _GEOHASH_ALPHABET.index(char)
+        for shift in range(4, -1, -1):
+            value_range = lon_range if even else lat_range
+            mid = (value_range[0] + value_range[1]) / 2
+            if (bits >> shift) & 1:
+                value_range[0] = mid
+            else:
+                value_range[1] = mid
+            even = not even
+    return (lat_range[0] + lat_range[1]) / 2, (lon_range[0] + lon_range[1]) / 2
+
+class _CellWindow:
+    """Ring buffer of per-bucket counts with an EWMA baseline of completed buckets"""
+
+    __slots__ = ('counts', 'last_bucket', 'window_total', 'baseline')
+
+    def __init__(self, bucket):
+        self.counts = [0] * WINDOW_BUCKETS
+        self.last_bucket = bucket
+        self.window_total = 0
+        self.baseline = 0.0
+
+    def advance(self, bucket):
+        elapsed = bucket - self.last_bucket
+        if elapsed <= 0:
+            return
+        # The last touched bucket completes with its count; the rest were empty
+        completed = self.counts[self.last_bucket % WINDOW_BUCKETS]
+        self.baseline = (1 - BASELINE_ALPHA) * self.baseline + BASELINE_ALPHA * completed
+        self.baseline *= (1 - BASELINE_ALPHA) ** (elapsed - 1)
+        for step in range(1, min(elapsed, WINDOW_BUCKETS) + 1):
+            slot = (self.last_bucket + step) % WINDOW_BUCKETS
+            self.window_total -= self.counts[slot]
+            self.counts[slot] = 0
+        self.last_bucket = bucket
+
+    def add(self, bucket, count=1):
+        if bucket <= self.last_bucket - WINDOW_BUCKETS:
+            return
+        self.advance(bucket)
+        self.counts[bucket % WINDOW_BUCKETS] += count
+        self.window_total += count
+
+    def score(self):
+        """Ratio of the current window count to the count the baseline predicts"""
+        expected = self.baseline * WINDOW_BUCKETS
+        return self.window_total / max(expected, 1.0)
+
+class _WindowedSketch:
+    """Count-min sketch per time bucket, summed over the sliding window"""
+
+    def __init__(self, width=SKETCH_WIDTH, depth=SKETCH_DEPTH):
+        import numpy as np
+        self.width = width
+        self.depth = depth
+        self.tables = np.zeros((WINDOW_BUCKETS, depth, width), dtype=np.int32)
+        self.last_bucket = None
+
+    def _columns(self, key):
+        data = key.encode('utf-8')
+        return [zlib.crc32(data, seed) % self.width for seed in range(self.depth)]
+
+    def advance(self, bucket):
+        if self.last_bucket is None:
+            self.last_bucket = bucket
+            return
+        elapsed = bucket - self.last_bucket
+        for step in range(1, min(max(elapsed, 0), WINDOW_BUCKETS) + 1):
+            self.tables[(self.last_bucket + step) % WINDOW_BUCKETS] = 0
+        if elapsed > 0:
+            self.last_bucket = bucket
+
+    def add(self, key, bucket, count=1):
+        if self.last_bucket is not None and bucket <= self.last_bucket - WINDOW_BUCKETS:
+            return
+        self.advance(bucket)
+        table = self.tables[bucket % WINDOW_BUCKETS]
+        for row, column in enumerate(self._columns(key)):
+            table[row, column] += count
+
+    def estimate(self, key):
+        return int(min(self.tables[:, row, column].sum() for row, column in enumerate(self._columns(key))))
+
+class BurstDetector:
+    """
+    Sliding-window tweet counts per geohash cell and per keyword. Each
+    observation costs O(WINDOW_BUCKETS + SKETCH_DEPTH) regardless of history,
+    and memory is bounded by MAX_CELLS and the sketch size.
+    """
+
+    def __init__(self, precision=GEOHASH_PRECISION, max_cells=MAX_CELLS):
+        self.precision = precision
+        self.max_cells = max_cells
+        self._cells = OrderedDict()
+        self._keywords = _WindowedSketch()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _bucket(timestamp):
+        return int(timestamp // BUCKET_SECONDS)
+
+    def observe(self, lat, lon, keywords=(), timestamp=None):
+        """Count one tweet at a location with the crisis keywords it matched"""
+        bucket = self._bucket(time.time() if timestamp is None else timestamp)
+        cell = geohash_encode(lat, lon, self.precision)
+        with self._lock:
+            window = self._cells.get(cell)
+            if window is None:
+                window = _CellWindow(bucket)
+                self._cells[cell] = window
+                if len(self._cells) > self.max_cells:
+                    self._cells.popitem(last=False)
+            else:
+                self._cells.move_to_end(cell)
+            window.add(bucket)
+            for keyword in keywords:
+                self._keywords.add(keyword, bucket)
+                self._keywords.add(f"{cell}|{keyword}", bucket)
+        return cell
+
+    def cell_score(self, cell, timestamp=None):
+        """Return (window_count, score) for a cell; score > 1 means above baseline"""
+        bucket = self._bucket(time.time() if timestamp is None else timestamp)
+        with self._lock:
+            window = self._cells.get(cell)
+            if window is None:
+                return 0, 0.0
+            window.advance(bucket)
+            return window.window_total, window.score()
+
+    def keyword_count(self, keyword, cell=None):
+        """Estimated count of a keyword in the window, optionally within one cell"""
+        key = f"{cell}|{keyword}" if cell else keyword
+        with self._lock:
+            self._keywords.advance(self._bucket(time.time()))
+            return self._keywords.estimate(key)
+
+    def hot_regions(self, limit=10, keywords=(), include_quiet=False):
+        """
+        Cells ordered by score, each with its center, window count, baseline
+        and the estimated counts of the given keywords in that cell
+        """
+        bucket = self._bucket(time.time())
+        regions = []
+        with self._lock:
+            for cell, window in self._cells.items():
+                window.advance(bucket)
+                if window.window_total == 0:
+                    continue
+                score = window.score()
+                hot = window.window_total >= HOT_MIN_COUNT and score >= HOT_RATIO
+                if hot or include_quiet:
+                    regions.append((cell, window.window_total, window.baseline, score, hot))
+            regions.sort(key=lambda region: (region[4], region[3], region[1]), reverse=True)
+            regions = regions[:limit]
+            if keywords:
+                self._keywords.advance(bucket)
+
+            results = []
+            for cell, count, baseline, score, hot in regions:
+                lat, lon = geohash_decode(cell)
+                keyword_counts = {}
+                for keyword in keywords:
+                    estimate = self._keywords.estimate(f"{cell}|{keyword}")
+                    if estimate:
+                        keyword_counts[keyword] = estimate
+                results.append({
+                    'cell': cell,
+                    'lat': lat,
+                    'lon': lon,
+                    'window_count': count,
+                    'baseline_per_bucket': baseline,
+                    'score': score,
+                    'hot': hot,
+                    'keywords': keyword_counts,
+                })
+        return results
+
+    def prioritize_alerts(self, alerts):
+        """
+        Order alerts by the burst score of their cell, then newest first.
+        Adds 'cell' and 'hotness' to each alert.
+        """
+        for alert in alerts:
+            cell = geohash_encode(alert['lat'], alert['lon'], self.precision)
+            alert['cell'] = cell
+            alert['hotness'] = self.cell_score(cell)[1]
+        alerts.sort(key=lambda alert: str(alert.get('time') or ''), reverse=True)
+        alerts.sort(key=lambda alert: alert['hotness'], reverse=True)
+        return alerts
+
+    def warm_from_alerts(self, alerts, keywords=()):
+        """
+        Replay stored alerts (oldest first) so a restarted process keeps its
+        window. Pass only the stream's alerts (status 'potential'): the stream
+        stores every geotagged keyword match it observes, whatever the model
+        says, so they are the population live observe counts. Alerts matching
+        none of the current keywords are skipped.
+        """
+        for alert in sorted(alerts, key=lambda alert: str(alert.get('time') or '')):
+            try:
+                timestamp = datetime.fromisoformat(str(alert['time'])).timestamp()
+            except ValueError:
+                continue
+            text = normalize_text(alert['text'])
+            matched_keywords = [k for k in keywords if k in text]
+            if keywords and not matched_keywords:
+                continue
+            self.observe(alert['lat'], alert['lon'], matched_keywords, timestamp)
+
+_detector = None
+_detector_lock = threading.Lock()
+
+def get_burst_detector():
+    """Return the process-wide burst detector"""
+    global _detector
+    with _detector_lock:
+        if _detector is None:
+            _detector = BurstDetector()
+        return _detector
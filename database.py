@@ -1,14 +1,23 @@
 import sqlite3
 import datetime
 import os
+import re
+
+from profiling import timed_query
 
 DB_PATH = "crisis_alerts.db"
 
+# Review decisions that become training labels for the online model
+FEEDBACK_LABELS = {'confirmed': 1, 'dismissed': 0}
+
 def init_db():
     """Initialize the database with required tables"""
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     
+    # Let retention maintenance reclaim space page by page (applies to new databases)
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    
     # Create alerts table
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS alerts (
@@ -17,9 +26,20 @@ def init_db():
         lat REAL NOT NULL,
         lon REAL NOT NULL,
         time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        status TEXT DEFAULT 'potential'
+        status TEXT DEFAULT 'potential',
+        model_label INTEGER
     )
     ''')
+    # Databases created before model_label existed
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(alerts)")]
+    if 'model_label' not in columns:
+        cursor.execute("ALTER TABLE alerts ADD COLUMN model_label INTEGER")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_alerts_status_time ON alerts (status, time)"
+    )
+    
+    # Create full-text index over alert texts, kept in sync by triggers
+    _init_alert_search(cursor)
     
     # Create subscriptions table
     cursor.execute('''
@@ -32,22 +52,82 @@ def init_db():
     )
     ''')
     
+    # Create feedback table of labeled review decisions
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS alert_feedback (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        alert_id INTEGER NOT NULL,
+        text TEXT NOT NULL,
+        label INTEGER NOT NULL,
+        time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        consumed INTEGER DEFAULT 0
+    )
+    ''')
+    
     conn.commit()
     conn.close()
 
-def insert_alert(text, lat, lon):
-    """Insert a new potential alert into the database"""
+def _init_alert_search(cursor):
+    """Create the FTS5 index over alerts, rebuilding it when first added to an existing database"""
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'alerts_fts'"
+    ).fetchone()
+    try:
+        cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS alerts_fts USING fts5(
+            text, content='alerts', content_rowid='id', tokenize='porter unicode61'
+        )
+        ''')
+    except sqlite3.OperationalError as e:
+        print(f"Full-text search unavailable: {e}")
+        return
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS alerts_fts_insert AFTER INSERT ON alerts BEGIN
+        INSERT INTO alerts_fts (rowid, text) VALUES (new.id, new.text);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS alerts_fts_delete AFTER DELETE ON alerts BEGIN
+        INSERT INTO alerts_fts (alerts_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS alerts_fts_update AFTER UPDATE OF text ON alerts BEGIN
+        INSERT INTO alerts_fts (alerts_fts, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO alerts_fts (rowid, text) VALUES (new.id, new.text);
+    END
+    ''')
+    if not exists:
+        cursor.execute("INSERT INTO alerts_fts (alerts_fts) VALUES ('rebuild')")
+
+def has_alert_search():
+    """True if the full-text index exists (SQLite may be built without FTS5)"""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'alerts_fts'"
+        ).fetchone() is not None
+    finally:
+        conn.close()
+
+@timed_query
+def insert_alert(text, lat, lon, model_label=None):
+    """
+    Insert a new potential alert into the database, with the classifier's
+    label (1 disaster, 0 not) when a model was available
+    """
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     cursor.execute(
-        "INSERT INTO alerts (text, lat, lon, time) VALUES (?, ?, ?, ?)",
-        (text, lat, lon, datetime.datetime.now())
+        "INSERT INTO alerts (text, lat, lon, time, model_label) VALUES (?, ?, ?, ?, ?)",
+        (text, lat, lon, datetime.datetime.now(), model_label)
     )
     alert_id = cursor.lastrowid
     conn.commit()
     conn.close()
     return alert_id
 
+@timed_query
 def update_alert_status(alert_id, status):
     """Update an alert status (confirmed or dismissed)"""
     conn = sqlite3.connect(DB_PATH)
@@ -56,9 +136,16 @@ def update_alert_status(alert_id, status):
         "UPDATE alerts SET status = ? WHERE id = ?",
         (status, alert_id)
     )
+    if status in FEEDBACK_LABELS:
+        cursor.execute(
+            "INSERT INTO alert_feedback (alert_id, text, label, time) "
+            "SELECT id, text, ?, ? FROM alerts WHERE id = ?",
+            (FEEDBACK_LABELS[status], datetime.datetime.now(), alert_id)
+        )
     conn.commit()
     conn.close()
 
+@timed_query
 def register_user(phone, lat, lon, radius):
     """Register a new user for notifications"""
     conn = sqlite3.connect(DB_PATH)
@@ -77,6 +164,7 @@ def register_user(phone, lat, lon, radius):
         conn.close()
     return success
 
+@timed_query
 def get_potential_alerts():
     """Get all potential alerts for review"""
     conn = sqlite3.connect(DB_PATH)
@@ -87,6 +175,7 @@ def get_potential_alerts():
     conn.close()
     return alerts
 
+@timed_query
 def get_all_users():
     """Get all registered users"""
     conn = sqlite3.connect(DB_PATH)
@@ -97,6 +186,7 @@ def get_all_users():
     conn.close()
     return users
 
+@timed_query
 def get_alert_by_id(alert_id):
     """Get alert details by ID"""
     conn = sqlite3.connect(DB_PATH)
@@ -106,3 +196,82 @@ def get_alert_by_id(alert_id):
     alert = cursor.fetchone()
     conn.close()
     return dict(alert) if alert else None
+
+@timed_query
+def get_pending_feedback(limit=100, after_id=0):
+    """Get labeled review decisions not yet folded into the model, oldest first"""
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT * FROM alert_feedback WHERE consumed = 0 AND id > ? ORDER BY id LIMIT ?",
+        (after_id, limit)
+    )
+    feedback = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return feedback
+
+@timed_query
+def mark_feedback_consumed(feedback_ids):
+    """Mark review decisions as folded into the model"""
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.executemany(
+        "UPDATE alert_feedback SET consumed = 1 WHERE id = ?",
+        [(feedback_id,) for feedback_id in feedback_ids]
+    )
+    conn.commit()
+    conn.close()
+
+def to_fts_query(text):
+    """Turn free text into an FTS5 query that matches all of its words"""
+    words = re.findall(r"\w+", text)
+    return " ".join(f'"{word}"' for word in words)
+
+@timed_query
+def search_alerts(query, status=None, since=None, until=None, bbox=None, limit=50):
+    """
+    Full-text search over alert texts, best matches first.
+    status is a status or list of statuses, since/until bound the alert time,
+    and bbox is (min_lat, min_lon, max_lat, max_lon).
+    Returns no results if SQLite has no full-text index.
+    """
+    fts_query = to_fts_query(query)
+    if not fts_query:
+        return []
+    
+    conditions = ["alerts_fts MATCH ?"]
+    params = [fts_query]
+    if status:
+        statuses = [status] if isinstance(status, str) else list(status)
+        conditions.append(f"a.status IN ({', '.join('?' for _ in statuses)})")
+        params.extend(statuses)
+    if since is not None:
+        conditions.append("julianday(a.time) >= julianday(?)")
+        params.append(str(since))
+    if until is not None:
+        conditions.append("julianday(a.time) < julianday(?)")
+        params.append(str(until))
+    if bbox is not None:
+        min_lat, min_lon, max_lat, max_lon = bbox
+        conditions.append("a.lat BETWEEN ? AND ? AND a.lon BETWEEN ? AND ?")
+        params.extend([min_lat, max_lat, min_lon, max_lon])
+    params.append(limit)
+    
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT a.*, bm25(alerts_fts) AS rank FROM alerts_fts "
+            "JOIN alerts a ON a.id = alerts_fts.rowid "
+            f"WHERE {' AND '.join(conditions)} ORDER BY rank LIMIT ?",
+            params
+        )
+    except sqlite3.OperationalError as e:
+        print(f"Full-text search unavailable: {e}")
+        conn.close()
+        return []
+    alerts = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return alerts
@@ -0,0 +1,298 @@
+import argparse
+import random
+import threading
+import time
+from collections import deque
+
+DEFAULT_RATE_PER_SECOND = 1.0   # Twilio's default throughput for one long code
+DEFAULT_BURST = 1
+STRIDE = 1000.0
+MAX_PRIORITY = 10.0
+DISTANCE_BANDS_KM = (1, 5, 10, 25, 50, 100)
+SAMPLES_PER_BAND = 10000
+RATE_LIMIT_RETRIES = 2
+
+class RateLimiter:
+    """Token bucket: rate tokens per second, holding at most burst tokens"""
+
+    def __init__(self, rate=DEFAULT_RATE_PER_SECOND, burst=DEFAULT_BURST,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self.set_rate(rate, burst)
+
+    def set_rate(self, rate, burst=DEFAULT_BURST):
+        """Change the limit; rate None disables limiting"""
+        with self._lock:
+            self.rate = rate
+            self.burst = max(burst, 1)
+            self.tokens = float(self.burst)
+            self.updated = self.clock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self):
+        """Take a token if one is available; returns True on success"""
+        with self._lock:
+            if self.rate is None:
+                return True
+            self._refill(self.clock())
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def acquire(self):
+        """Block until a token is available"""
+        while True:
+            with self._lock:
+                if self.rate is None:
+                    return
+                self._refill(self.clock())
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+
+class SimulatedSender:
+    """
+    Stand-in for send_sms that enforces a provider-side rate limit: sends
+    beyond it fail with a 429 like Twilio would. Records every attempt.
+    """
+
+    def __init__(self, rate_per_second=DEFAULT_RATE_PER_SECOND, burst=DEFAULT_BURST,
+                 latency=0.0, failure_rate=0.0, seed=0):
+        self.limit = RateLimiter(rate_per_second, burst)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.sent = []
+        self.rejected = 0
+
+    def __call__(self, to_number, message):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            if not self.limit.try_acquire():
+                self.rejected += 1
+                return False, "429 Too Many Requests"
+            if self._rng.random() < self.failure_rate:
+                return False, "Simulated delivery failure"
+            self.sent.append((to_number, message, time.monotonic()))
+            return True, f"SIM{len(self.sent):08d}"
+
+class DeliveryJob:
+    """Notifications for one alert, nearest recipient first"""
+
+    def __init__(self, alert_id, recipients, message, priority, send):
+        # recipients: (user_id, phone, distance_km) sorted by distance
+        self.alert_id = alert_id
+        self.recipients = recipients
+        self.message = message
+        self.priority = min(max(float(priority), 1.0), MAX_PRIORITY)
+        self.send = send
+        self.position = 0
+        self.pass_value = 0.0
+        self.results = []
+        self.submitted_at = time.monotonic()
+        self.finished_at = None
+        self._done = threading.Event()
+
+    @property
+    def total(self):
+        return len(self.recipients)
+
+    def is_done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Block until every recipient has been attempted; returns the results"""
+        self._done.wait(timeout)
+        return self.results
+
+    def progress(self):
+        """Return (attempted, total)"""
+        return len(self.results), self.total
+
+def distance_band(distance_km):
+    """Label of the distance band a recipient falls in"""
+    lower = 0
+    for upper in DISTANCE_BANDS_KM:
+        if distance_km < upper:
+            return f"{lower}-{upper} km"
+        lower = upper
+    return f"{lower}+ km"
+
+def _percentile(sorted_values, fraction):
+    index = min(int(fraction * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+class DeliveryScheduler:
+    """
+    Single worker that drains delivery jobs through a shared rate limiter.
+    Jobs are interleaved by stride scheduling, so each active alert gets a
+    share of the send rate proportional to its priority, and each job sends
+    to its recipients nearest first.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE_PER_SECOND, burst=DEFAULT_BURST):
+        self.limiter = RateLimiter(rate, burst)
+        self._cond = threading.Condition()
+        self._jobs = []
+        self._thread = None
+        self._samples = {}
+        self._samples_lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+
+    def set_rate(self, rate, burst=DEFAULT_BURST):
+        """Change the shared send rate; rate None disables limiting"""
+        self.limiter.set_rate(rate, burst)
+
+    def submit(self, alert_id, recipients, message, send, priority=1.0):
+        """
+        Queue notifications for one alert. recipients are (user_id, phone,
+        distance_km) tuples in any order. Returns the DeliveryJob.
+        """
+        job = DeliveryJob(alert_id, sorted(recipients, key=lambda r: r[2]), message, priority, send)
+        if not job.recipients:
+            job.finished_at = job.submitted_at
+            job._done.set()
+            return job
+        with self._cond:
+            # Start level with the active jobs so a new alert neither waits
+            # for older ones nor gets to catch up on their past sends
+            job.pass_value = min((j.pass_value for j in self._jobs), default=0.0)
+            self._jobs.append(job)
+            self._ensure_worker()
+            self._cond.notify()
+        return job
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _next_send(self):
+        with self._cond:
+            while not self._jobs:
+                self._cond.wait()
+            job = min(self._jobs, key=lambda j: j.pass_value)
+            recipient = job.recipients[job.position]
+            job.position += 1
+            job.pass_value += STRIDE / job.priority
+            if job.position == job.total:
+                self._jobs.remove(job)
+            return job, recipient
+
+    def _run(self):
+        while True:
+            job, (user_id, phone, distance) = self._next_send()
+            for _ in range(RATE_LIMIT_RETRIES + 1):
+                self.limiter.acquire()
+                try:
+                    success, msg_id = job.send(phone, job.message)
+                except Exception as e:
+                    success, msg_id = False, str(e)
+                # Clock skew against the provider's own limiter: wait for the next token
+                if success or '429' not in str(msg_id):
+                    break
+            if success:
+                self.sent += 1
+                self._record(distance, time.monotonic() - job.submitted_at)
+            else:
+                self.failed += 1
+            job.results.append((success, user_id, msg_id))
+            if len(job.results) == job.total:
+                job.finished_at = time.monotonic()
+                job._done.set()
+
+    def _record(self, distance, seconds):
+        band = distance_band(distance)
+        with self._samples_lock:
+            if band not in self._samples:
+                self._samples[band] = deque(maxlen=SAMPLES_PER_BAND)
+            self._samples[band].append(seconds)
+
+    def pending(self):
+        """Number of queued sends not yet attempted"""
+        with self._cond:
+            return sum(job.total - job.position for job in self._jobs)
+
+    def report(self):
+        """Time-to-notify percentiles (seconds) per distance band, nearest band first"""
+        with self._samples_lock:
+            samples = {band: sorted(values) for band, values in self._samples.items()}
+        bands = [distance_band(upper - 0.5) for upper in DISTANCE_BANDS_KM]
+        bands.append(distance_band(DISTANCE_BANDS_KM[-1]))
+        rows = []
+        for band in bands:
+            values = samples.get(band)
+            if not values:
+                continue
+            rows.append({
+                'band': band,
+                'delivered': len(values),
+                'p50_seconds': _percentile(values, 0.50),
+                'p90_seconds': _percentile(values, 0.90),
+                'p99_seconds': _percentile(values, 0.99),
+                'max_seconds': values[-1],
+            })
+        return rows
+
+    def reset_report(self):
+        with self._samples_lock:
+            self._samples.clear()
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_delivery_scheduler():
+    """Return the process-wide delivery scheduler"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = DeliveryScheduler()
+        return _scheduler
+
+def simulate(alerts=3, recipients=200, rate=50.0, spread_km=60.0, seed=0):
+    """
+    Deliver several concurrent alerts through a SimulatedSender limited to
+    rate messages per second and return (jobs, scheduler, sender)
+    """
+    rng = random.Random(seed)
+    sender = SimulatedSender(rate_per_second=rate)
+    scheduler = DeliveryScheduler(rate=rate)
+    jobs = []
+    for alert_id in range(1, alerts + 1):
+        people = [(i, f"+1555{alert_id:02d}{i:05d}", spread_km * rng.random()) for i in range(recipients)]
+        jobs.append(scheduler.submit(alert_id, people, f"Simulated alert {alert_id}", sender,
+                                     priority=alert_id))
+    for job in jobs:
+        job.wait()
+    return jobs, scheduler, sender
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate rate-limited, nearest-first alert delivery")
+    parser.add_argument('--alerts', type=int, default=3, help="Concurrent alerts (priority 1..N)")
+    parser.add_argument('--recipients', type=int, default=200, help="Recipients per alert")
+    parser.add_argument('--rate', type=float, default=50.0, help="Messages per second")
+    args = parser.parse_args()
+
+    jobs, scheduler, sender = simulate(args.alerts, args.recipients, args.rate)
+    for job in jobs:
+        print(f"Alert {job.alert_id} (priority {job.priority:.0f}): {len(job.results)} sent, "
+              f"finished after {job.finished_at - job.submitted_at:.2f}s")
+    print(f"Provider rejections (429): {sender.rejected}")
+    print(f"{'band':<12}{'sent':>6}{'p50 s':>9}{'p90 s':>9}{'p99 s':>9}")
+    for row in scheduler.report():
+        print(f"{row['band']:<12}{row['delivered']:>6}{row['p50_seconds']:>9.2f}"
+              f"{row['p90_seconds']:>9.2f}{row['p99_seconds']:>9.2f}")
+
+if __name__ == "__main__":
+    main()
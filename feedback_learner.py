@@ -0,0 +1,81 @@
+import copy
+import threading
+
+from database import get_pending_feedback, mark_feedback_consumed
+from model_store import get_model, swap_model
+
+FEEDBACK_INTERVAL_SECONDS = 300
+FEEDBACK_BATCH_SIZE = 64
+
+_learner_thread = None
+_learner_stop_event = None
+_learner_lock = threading.Lock()
+# Whether the learner has said it is holding feedback back for the current model
+_deferral_logged = False
+
+def apply_pending_feedback(batch_size=FEEDBACK_BATCH_SIZE):
+    """
+    Fold pending confirm/dismiss decisions into the shared model in mini-batches
+    and hot-swap the updated model. Returns the number of examples applied.
+    """
+    global _deferral_logged
+    from online_model import save_online_model, update_online_model
+
+    model, vectorizer = get_model()
+    if model is None or not hasattr(model, 'partial_fit'):
+        if not _deferral_logged:
+            reason = "no model is loaded" if model is None else "the active model cannot be updated incrementally"
+            print(f"Operator feedback deferred: {reason}; train with --mode hashing to apply it")
+            _deferral_logged = True
+        return 0
+    _deferral_logged = False
+
+    # Update a copy so predictions in flight keep using a consistent model
+    updated = copy.deepcopy(model)
+    applied_ids = []
+    while True:
+        feedback = get_pending_feedback(batch_size, after_id=applied_ids[-1] if applied_ids else 0)
+        if not feedback:
+            break
+        update_online_model(
+            updated, vectorizer,
+            [row['text'] for row in feedback],
+            [row['label'] for row in feedback]
+        )
+        applied_ids.extend(row['id'] for row in feedback)
+
+    if applied_ids:
+        save_online_model(updated, vectorizer)
+        swap_model(updated, vectorizer)
+        mark_feedback_consumed(applied_ids)
+        print(f"Applied {len(applied_ids)} operator decisions to the online model")
+    return len(applied_ids)
+
+def _run_learner(stop_event, interval):
+    while not stop_event.wait(interval):
+        try:
+            apply_pending_feedback()
+        except Exception as e:
+            print(f"Feedback learner error: {e}")
+
+def start_feedback_learner(interval=FEEDBACK_INTERVAL_SECONDS):
+    """Start the background feedback learner once per process"""
+    global _learner_thread, _learner_stop_event
+    with _learner_lock:
+        if _learner_thread is not None and _learner_thread.is_alive():
+            return _learner_thread
+        _learner_stop_event = threading.Event()
+        _learner_thread = threading.Thread(
+            target=_run_learner,
+            args=(_learner_stop_event, interval),
+            daemon=True
+        )
+        _learner_thread.start()
+        print("Feedback learner started")
+        return _learner_thread
+
+def stop_feedback_learner():
+    """Stop the background feedback learner"""
+    with _learner_lock:
+        if _learner_stop_event is not None:
+            _learner_stop_event.set()
@@ -0,0 +1,343 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections import namedtuple
+
+import numpy as np
+
+import text_processing
+from text_processing import uses_pipeline
+
+# An artifact is a directory of plain .npy arrays plus meta.json. Arrays are
+# memory-mapped read-only, so loading unpickles nothing and pages are shared
+# between processes.
+ARTIFACT_DIR = 'model_artifact'
+FORMAT_VERSION = 1
+
+# Rows of a CSR matrix, enough for the predictor without depending on scipy
+SparseBatch = namedtuple('SparseBatch', ['indptr', 'indices', 'data', 'n_features'])
+
+def _check_vectorizer(vectorizer):
+    unsupported = []
+    if vectorizer.analyzer != 'word':
+        unsupported.append(f"analyzer={vectorizer.analyzer!r}")
+    if tuple(vectorizer.ngram_range) != (1, 1):
+        unsupported.append(f"ngram_range={vectorizer.ngram_range!r}")
+    if vectorizer.preprocessor is not None:
+        unsupported.append("custom preprocessor")
+    if vectorizer.tokenizer is not None and not uses_pipeline(vectorizer):
+        unsupported.append("custom tokenizer")
+    if vectorizer.strip_accents is not None:
+        unsupported.append(f"strip_accents={vectorizer.strip_accents!r}")
+    if vectorizer.norm not in ('l2', 'l1', None):
+        unsupported.append(f"norm={vectorizer.norm!r}")
+    if unsupported:
+        raise ValueError(f"Cannot export vectorizer with {', '.join(unsupported)}")
+
+def _term_hash(term):
+    return int.from_bytes(hashlib.blake2b(term, digest_size=8).digest(), 'little')
+
+def _vocabulary_arrays(vocabulary):
+    """
+    Lay the vocabulary out as sorted 64-bit term hashes with matching columns,
+    plus the UTF-8 terms concatenated into one byte blob to verify matches
+    """
+    terms = sorted((_term_hash(term.encode('utf-8')), term.encode('utf-8'), column)
+                   for term, column in vocabulary.items())
+    hashes = np.array([h for h, _, _ in terms], dtype=np.uint64)
+    if len(hashes) > 1 and np.any(hashes[1:] == hashes[:-1]):
+        raise ValueError("Vocabulary term hash collision")
+    lengths = np.array([len(term) for _, term, _ in terms], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+    blob = np.frombuffer(b''.join(term for _, term, _ in terms), dtype=np.uint8)
+    columns = np.array([column for _, _, column in terms], dtype=np.int32)
+    return {
+        'vocab_hashes': hashes,
+        'vocab_columns': columns,
+        'vocab_offsets': offsets,
+        'vocab_blob': blob,
+    }
+
+def _dense(array):
+    return array.toarray() if hasattr(array, 'toarray') else np.asarray(array)
+
+def _classifier_arrays(model, n_features):
+    """Return (meta, arrays) describing the decision function of a binary classifier"""
+    classes = [int(c) for c in model.classes_]
+    if len(classes) != 2:
+        raise ValueError("Only binary classifiers can be exported")
+
+    kernel = getattr(model, 'kernel', 'linear')
+    if kernel == 'linear' and hasattr(model, 'coef_'):
+        coef = _dense(model.coef_)
+        meta = {'kind': 'linear', 'classes': classes, 'intercept': float(np.ravel(model.intercept_)[0])}
+        return meta, {'coef': coef.ravel().astype(np.float64)}
+
+    if kernel == 'rbf':
+        import scipy.sparse as sp
+        support = sp.csc_matrix(model.support_vectors_, shape=(model.support_vectors_.shape[0], n_features))
+        sq_norms = np.asarray(support.multiply(support).sum(axis=1)).ravel()
+        meta = {
+            'kind': 'rbf',
+            'classes': classes,
+            'intercept': float(model.intercept_[0]),
+            'gamma': float(model._gamma),
+        }
+        arrays = {
+            'sv_data': support.data.astype(np.float64),
+            'sv_indices': support.indices.astype(np.int32),
+            'sv_indptr': support.indptr.astype(np.int64),
+            'sv_sq_norms': sq_norms.astype(np.float64),
+            'dual_coef': _dense(model.dual_coef_).ravel().astype(np.float64),
+        }
+        return meta, arrays
+
+    raise ValueError(f"Cannot export classifier with kernel={kernel!r}")
+
+def export_artifact(model, vectorizer, out_dir=ARTIFACT_DIR):
+    """Write a fitted TfidfVectorizer and binary classifier as a compact artifact"""
+    _check_vectorizer(vectorizer)
+    vocab_arrays = _vocabulary_arrays(vectorizer.vocabulary_)
+    n_features = len(vocab_arrays['vocab_columns'])
+    model_meta, arrays = _classifier_arrays(model, n_features)
+    arrays.update(vocab_arrays)
+    if vectorizer.use_idf:
+        arrays['idf'] = vectorizer.idf_.astype(np.float64)
+
+    meta = {
+        'format_version': FORMAT_VERSION,
+        'n_features': n_features,
+        'vectorizer': {
+            'lowercase': bool(vectorizer.lowercase),
+            'token_pattern': vectorizer.token_pattern,
+            # Tokenized by text_processing.tokenize when set; checked on load
+            'text_pipeline_version': text_processing.PIPELINE_VERSION if uses_pipeline(vectorizer) else None,
+            'binary': bool(vectorizer.binary),
+            'sublinear_tf': bool(vectorizer.sublinear_tf),
+            'use_idf': bool(vectorizer.use_idf),
+            'norm': vectorizer.norm,
+        },
+        'model': model_meta,
+    }
+
+    # Write into a fresh directory and swap it in so readers never see a
+    # partial artifact; a new directory per export so files left by a
+    # crashed export are never picked up
+    parent = os.path.dirname(os.path.abspath(out_dir))
+    prefix = f"{os.path.basename(out_dir)}."
+    tmp_dir = tempfile.mkdtemp(prefix=f"{prefix}tmp-", dir=parent)
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), array, allow_pickle=False)
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    if os.path.isdir(out_dir):
+        old_dir = tempfile.mkdtemp(prefix=f"{prefix}old-", dir=parent)
+        os.rmdir(old_dir)
+        os.replace(out_dir, old_dir)
+        os.replace(tmp_dir, out_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+    else:
+        os.replace(tmp_dir, out_dir)
+    return out_dir
+
+class CompactVectorizer:
+    """TF-IDF transform backed by memory-mapped vocabulary and IDF arrays"""
+
+    def __init__(self, meta, arrays):
+        config = meta['vectorizer']
+        self.n_features = meta['n_features']
+        self.lowercase = config['lowercase']
+        self.binary = config['binary']
+        self.sublinear_tf = config['sublinear_tf']
+        self.norm = config['norm']
+        self.pipeline_version = config.get('text_pipeline_version')
+        if self.pipeline_version is not None and self.pipeline_version != text_processing.PIPELINE_VERSION:
+            raise ValueError(f"Artifact expects text pipeline v{self.pipeline_version}, "
+                             f"this code has v{text_processing.PIPELINE_VERSION}")
+        self.token_re = re.compile(config['token_pattern']) if config['token_pattern'] else None
+        self.vocab_hashes = arrays['vocab_hashes']
+        self.vocab_columns = arrays['vocab_columns']
+        self.vocab_offsets = arrays['vocab_offsets']
+        self.vocab_blob = arrays['vocab_blob']
+        self.idf = arrays.get('idf')
+
+    def _tokens(self, text):
+        if self.pipeline_version is not None:
+            return text_processing.tokenize(text)
+        if self.lowercase:
+            text = text.lower()
+        return self.token_re.findall(text)
+
+    def _row(self, text):
+        tokens = [t.encode('utf-8') for t in self._tokens(text)]
+        if not tokens:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64)
+
+        hashes = np.array([_term_hash(t) for t in tokens], dtype=np.uint64)
+        positions = np.minimum(np.searchsorted(self.vocab_hashes, hashes), len(self.vocab_hashes) - 1)
+        matched = []
+        for token, token_hash, position in zip(tokens, hashes, positions):
+            if self.vocab_hashes[position] != token_hash:
+                continue
+            start, end = self.vocab_offsets[position], self.vocab_offsets[position + 1]
+            if self.vocab_blob[start:end].tobytes() == token:
+                matched.append(self.vocab_columns[position])
+        if not matched:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64)
+        columns, counts = np.unique(np.array(matched, dtype=np.int32), return_counts=True)
+
+        values = counts.astype(np.float64)
+        if self.binary:
+            values[:] = 1.0
+        elif self.sublinear_tf:
+            values = np.log(values) + 1.0
+        if self.idf is not None:
+            values *= self.idf[columns]
+        if self.norm == 'l2':
+            norm = np.sqrt(np.dot(values, values))
+        elif self.norm == 'l1':
+            norm = np.abs(values).sum()
+        else:
+            norm = 0.0
+        if norm > 0:
+            values /= norm
+        return columns.astype(np.int32), values
+
+    def transform(self, texts):
+        """Vectorize an iterable of texts into a SparseBatch"""
+        indptr = [0]
+        indices = []
+        data = []
+        for text in texts:
+            columns, values = self._row(text)
+            indices.append(columns)
+            data.append(values)
+            indptr.append(indptr[-1] + len(columns))
+        return SparseBatch(
+            np.array(indptr, dtype=np.int64),
+            np.concatenate(indices) if indices else np.empty(0, dtype=np.int32),
+            np.concatenate(data) if data else np.empty(0, dtype=np.float64),
+            self.n_features,
+        )
+
+class CompactClassifier:
+    """Binary classifier evaluated directly from memory-mapped arrays"""
+
+    def __init__(self, meta, arrays):
+        model = meta['model']
+        self.kind = model['kind']
+        self.classes_ = np.array(model['classes'])
+        self.intercept = model['intercept']
+        self.gamma = model.get('gamma')
+        self.arrays = arrays
+
+    def _decision_row(self, indices, data):
+        if self.kind == 'linear':
+            return float(np.dot(self.arrays['coef'][indices], data)) + self.intercept
+
+        # RBF: ||x - sv||^2 = ||x||^2 + ||sv||^2 - 2 x.sv, with x.sv gathered per feature column
+        sv_indptr = self.arrays['sv_indptr']
+        sv_indices = self.arrays['sv_indices']
+        sv_data = self.arrays['sv_data']
+        sq_norms = self.arrays['sv_sq_norms']
+        dots = np.zeros(len(sq_norms), dtype=np.float64)
+        for column, value in zip(indices, data):
+            start, end = sv_indptr[column], sv_indptr[column + 1]
+            dots[sv_indices[start:end]] += value * sv_data[start:end]
+        distances = np.dot(data, data) + sq_norms - 2.0 * dots
+        kernel = np.exp(-self.gamma * distances)
+        return float(np.dot(self.arrays['dual_coef'], kernel)) + self.intercept
+
+    def decision_function(self, X):
+        """Return the signed distance to the decision boundary for each row"""
+        scores = np.empty(len(X.indptr) - 1, dtype=np.float64)
+        for i in range(len(scores)):
+            start, end = X.indptr[i], X.indptr[i + 1]
+            scores[i] = self._decision_row(X.indices[start:end], X.data[start:end])
+        return scores
+
+    def predict(self, X):
+        """Predict the class label for each row"""
+        return self.classes_[(self.decision_function(X) > 0).astype(int)]
+
+def is_artifact(path):
+    """Return True if path looks like a compact artifact directory"""
+    return os.path.isfile(os.path.join(path, 'meta.json'))
+
+def load_artifact(path=ARTIFACT_DIR):
+    """
+    Memory-map a compact artifact
+    Returns (model, vectorizer) with the same predict/transform calls as the pickles
+    """
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    if meta.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format version: {meta.get('format_version')}")
+
+    arrays = {}
+    for name in os.listdir(path):
+        if name.endswith('.npy'):
+            arrays[name[:-4]] = np.load(os.path.join(path, name), mmap_mode='r', allow_pickle=False)
+    return CompactClassifier(meta, arrays), CompactVectorizer(meta, arrays)
+
+def _load_pickles(model_path, vectorizer_path):
+    import pickle
+    with open(model_path, 'rb') as f:
+        model = pickle.load(f)
+    with open(vectorizer_path, 'rb') as f:
+        vectorizer = pickle.load(f)
+    return model, vectorizer
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or check a compact model artifact")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help="Convert pickled model files to a compact artifact")
+    export_parser.add_argument('--model', default='model.pkl')
+    export_parser.add_argument('--vectorizer', default='vectorizer.pkl')
+    export_parser.add_argument('--out', default=ARTIFACT_DIR)
+
+    check_parser = subparsers.add_parser('check', help="Compare artifact predictions and load time with the pickles")
+    check_parser.add_argument('--model', default='model.pkl')
+    check_parser.add_argument('--vectorizer', default='vectorizer.pkl')
+    check_parser.add_argument('--artifact', default=ARTIFACT_DIR)
+    check_parser.add_argument('--data', default='tweets.csv')
+    check_parser.add_argument('--rows', type=int, default=1000)
+
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        model, vectorizer = _load_pickles(args.model, args.vectorizer)
+        export_artifact(model, vectorizer, args.out)
+        print(f"Artifact written to {args.out}")
+        return
+
+    start = time.perf_counter()
+    model, vectorizer = _load_pickles(args.model, args.vectorizer)
+    pickle_load = time.perf_counter() - start
+    start = time.perf_counter()
+    compact_model, compact_vectorizer = load_artifact(args.artifact)
+    artifact_load = time.perf_counter() - start
+
+    import pandas as pd
+    texts = pd.read_csv(args.data, nrows=args.rows)['text'].fillna('').tolist()
+    expected = model.predict(vectorizer.transform(texts))
+    actual = compact_model.predict(compact_vectorizer.transform(texts))
+    agreement = float(np.mean(expected == actual))
+
+    print(f"Pickle load:   {pickle_load * 1000:.1f} ms")
+    print(f"Artifact load: {artifact_load * 1000:.1f} ms")
+    print(f"Prediction agreement on {len(texts)} tweets: {agreement:.4f}")
+
+if __name__ == "__main__":
+    main()
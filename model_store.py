@@ -0,0 +1,141 @@
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+MODEL_PATH = 'model.pkl'
+VECTORIZER_PATH = 'vectorizer.pkl'
+
+# Written by whichever training mode installed last, so a TF-IDF install
+# after a hashing run is not shadowed by online_model.pkl
+ACTIVE_MODEL_PATH = 'active_model.json'
+ACTIVE_ONLINE = 'online'
+ACTIVE_TFIDF = 'tfidf'
+
+# Process-wide model shared by the stream thread and every Streamlit session.
+# Readers take a (model, vectorizer) snapshot; updates replace it wholesale.
+_lock = threading.Lock()
+_model = None
+_vectorizer = None
+_version = 0
+
+# Predictions keyed by (model version, text): retweets and copied texts
+# recur constantly during an event and need classifying only once
+PREDICTION_CACHE_SIZE = 65536
+_prediction_lock = threading.Lock()
+_predictions = OrderedDict()
+
+def set_active_model(kind, version=None):
+    """Record which installed model the app should load ('online' or 'tfidf')"""
+    tmp_path = f"{ACTIVE_MODEL_PATH}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({'kind': kind, 'version': version}, f)
+    os.replace(tmp_path, ACTIVE_MODEL_PATH)
+
+def get_active_model():
+    """Return the active model kind, or None if no install has recorded one"""
+    try:
+        with open(ACTIVE_MODEL_PATH) as f:
+            return json.load(f).get('kind')
+    except (OSError, ValueError):
+        return None
+
+def load_model_files():
+    """
+    Load the active model from disk. The online hashing model is used when
+    it is active (or, with no active_model.json, whenever it exists);
+    otherwise the compact artifact, then the original pickles.
+    Returns (model, vectorizer), or (None, None) if nothing can be loaded
+    """
+    from online_model import has_online_model, load_online_model
+    from model_artifact import ARTIFACT_DIR, is_artifact, load_artifact
+
+    if get_active_model() != ACTIVE_TFIDF and has_online_model():
+        try:
+            return load_online_model()
+        except (OSError, pickle.UnpicklingError) as e:
+            print(f"Failed to load online model, falling back to the TF-IDF model: {e}")
+    if is_artifact(ARTIFACT_DIR):
+        try:
+            return load_artifact(ARTIFACT_DIR)
+        except (OSError, ValueError) as e:
+            print(f"Failed to load compact model artifact, falling back to pickles: {e}")
+    if not (os.path.exists(MODEL_PATH) and os.path.exists(VECTORIZER_PATH)):
+        return None, None
+    try:
+        with open(MODEL_PATH, 'rb') as f:
+            model = pickle.load(f)
+        with open(VECTORIZER_PATH, 'rb') as f:
+            vectorizer = pickle.load(f)
+        return model, vectorizer
+    except (OSError, pickle.UnpicklingError) as e:
+        print(f"Failed to load model pickles: {e}")
+        return None, None
+
+def has_model_files():
+    """Return True if any model can be loaded, without loading it"""
+    from online_model import has_online_model
+    from model_artifact import ARTIFACT_DIR, is_artifact
+
+    if _model is not None:
+        return True
+    return (
+        has_online_model()
+        or is_artifact(ARTIFACT_DIR)
+        or (os.path.exists(MODEL_PATH) and os.path.exists(VECTORIZER_PATH))
+    )
+
+def _load_snapshot():
+    global _model, _vectorizer, _version
+    with _lock:
+        if _model is None:
+            model, vectorizer = load_model_files()
+            if model is not None:
+                _model, _vectorizer = model, vectorizer
+                _version += 1
+                print(f"Loaded model version {_version}")
+        return _model, _vectorizer, _version
+
+def get_model():
+    """Return the current (model, vectorizer), loading it on first use"""
+    model, vectorizer, _ = _load_snapshot()
+    return model, vectorizer
+
+def predict_text(text):
+    """
+    Classify one text with the shared model, memoized per model version.
+    Returns the predicted label, or None if no model is available
+    """
+    model, vectorizer, version = _load_snapshot()
+    if model is None:
+        return None
+    key = (version, text)
+    with _prediction_lock:
+        prediction = _predictions.get(key)
+        if prediction is not None:
+            _predictions.move_to_end(key)
+            return prediction
+    prediction = int(model.predict(vectorizer.transform([text]))[0])
+    with _prediction_lock:
+        _predictions[key] = prediction
+        if len(_predictions) > PREDICTION_CACHE_SIZE:
+            _predictions.popitem(last=False)
+    return prediction
+
+def swap_model(model, vectorizer):
+    """Atomically replace the shared model; returns the new version number"""
+    global _model, _vectorizer, _version
+    with _lock:
+        _model, _vectorizer = model, vectorizer
+        _version += 1
+        print(f"Swapped in model version {_version}")
+        version = _version
+    # Entries of the old version can never hit again
+    with _prediction_lock:
+        _predictions.clear()
+    return version
+
+def get_model_version():
+    """Return the version number of the shared model (0 if none is loaded)"""
+    return _version
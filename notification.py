@@ -1,18 +1,28 @@
 import streamlit as st
-from twilio.rest import Client
-from database import get_all_users
-from utils import is_user_in_radius
+from burst_detector import geohash_encode, get_burst_detector
+from delivery_scheduler import DEFAULT_RATE_PER_SECOND, get_delivery_scheduler
+from subscriber_store import get_subscriber_store
 
-def send_sms(to_number, message):
-    """Send SMS using Twilio"""
-    try:
+_twilio_client = None
+_scheduler_configured = False
+
+def get_twilio_client():
+    """Create the Twilio client once per process"""
+    global _twilio_client
+    if _twilio_client is None:
+        from twilio.rest import Client
+        
         # Get Twilio credentials from Streamlit secrets
         account_sid = st.secrets["twilio"]["account_sid"]
         auth_token = st.secrets["twilio"]["auth_token"]
+        _twilio_client = Client(account_sid, auth_token)
+    return _twilio_client
+
+def send_sms(to_number, message):
+    """Send SMS using Twilio"""
+    try:
         twilio_number = st.secrets["twilio"]["phone_number"]
-        
-        # Initialize Twilio client
-        client = Client(account_sid, auth_token)
+        client = get_twilio_client()
         
         # Send message
         message = client.messages.create(
@@ -25,30 +35,62 @@ def send_sms(to_number, message):
     except Exception as e:
         return False, str(e)
 
+def get_scheduler():
+    """Return the delivery scheduler, limited to the configured Twilio send rate"""
+    global _scheduler_configured
+    scheduler = get_delivery_scheduler()
+    if not _scheduler_configured:
+        try:
+            rate = float(st.secrets["twilio"].get("messages_per_second", DEFAULT_RATE_PER_SECOND))
+        except Exception:
+            rate = DEFAULT_RATE_PER_SECOND
+        scheduler.set_rate(rate)
+        _scheduler_configured = True
+    return scheduler
+
+def alert_priority(alert):
+    """Explicit alert priority, else the burst score of the alert's region"""
+    if alert.get('priority') is not None:
+        return alert['priority']
+    hotness = alert.get('hotness')
+    if hotness is None:
+        hotness = get_burst_detector().cell_score(geohash_encode(alert['lat'], alert['lon']))[1]
+    return max(1.0, hotness)
+
+def schedule_notifications(alert):
+    """
+    Queue SMS notifications for users whose radius covers the crisis,
+    nearest first, and return the DeliveryJob without waiting
+    """
+    store = get_subscriber_store()
+    store.refresh()
+    stats = store.stats()
+    print(f"Subscriber snapshot: {stats['subscribers']} subscribers, "
+          f"{stats['bytes_per_subscriber']:.0f} bytes each, "
+          f"refreshed {stats['last_refresh_rows']} rows in {stats['last_refresh_seconds'] * 1000:.1f} ms")
+    
+    # Check which users are within their specified radius of the alert
+    user_ids, distances = store.find_in_radius(alert['lat'], alert['lon'])
+    phones = store.get_phones(user_ids)
+    # Users unsubscribed since the last refresh have no phone
+    recipients = [(user_id, phones[user_id], distance)
+                  for user_id, distance in zip(user_ids.tolist(), distances.tolist()) if user_id in phones]
+    
+    # Create alert message
+    message = (
+        f"CRISIS ALERT: {alert['text'][:100]}... "
+        f"Location: {alert['lat']:.4f}, {alert['lon']:.4f}. "
+        f"Stay safe and follow official guidance."
+    )
+    
+    priority = alert_priority(alert)
+    job = get_scheduler().submit(alert.get('id'), recipients, message, send_sms, priority)
+    print(f"Queued {job.total} notifications for alert {alert.get('id')} at priority {job.priority:.1f}")
+    return job
+
 def notify_users_in_radius(alert):
     """
     Notify users who are within their specified radius of the crisis
     Returns tuples of (success, user_id, message) for each notification attempt
     """
-    users = get_all_users()
-    results = []
-    
-    for user in users:
-        # Check if user is within their specified radius of the alert
-        if is_user_in_radius(
-            user['lat'], user['lon'], 
-            alert['lat'], alert['lon'], 
-            user['radius']
-        ):
-            # Create alert message
-            message = (
-                f"CRISIS ALERT: {alert['text'][:100]}... "
-                f"Location: {alert['lat']:.4f}, {alert['lon']:.4f}. "
-                f"Stay safe and follow official guidance."
-            )
-            
-            # Send SMS notification
-            success, msg_id = send_sms(user['phone'], message)
-            results.append((success, user['id'], msg_id))
-    
-    return results
+    return schedule_notifications(alert).wait()
@@ -0,0 +1,162 @@
+import os
+import pickle
+import time
+
+import numpy as np
+
+ONLINE_MODEL_PATH = 'online_model.pkl'
+ONLINE_VECTORIZER_PATH = 'online_vectorizer.pkl'
+HASHING_FEATURES = 2 ** 18
+CLASSES = np.array([0, 1])
+
+def make_hashing_vectorizer(n_features=HASHING_FEATURES):
+    """Create a stateless vectorizer with a fixed number of hashed features"""
+    from sklearn.feature_extraction.text import HashingVectorizer
+    from text_processing import tokenize
+    return HashingVectorizer(n_features=n_features, alternate_sign=False, norm='l2',
+                             tokenizer=tokenize, token_pattern=None, lowercase=False)
+
+def make_online_model():
+    """Create a linear classifier that supports incremental partial_fit updates"""
+    from sklearn.linear_model import SGDClassifier
+    return SGDClassifier(loss='hinge', alpha=1e-5, random_state=42)
+
+def update_online_model(model, vectorizer, texts, labels):
+    """Fold a mini-batch of labeled texts into the model in place"""
+    if len(texts) == 0:
+        return model
+    X = vectorizer.transform(texts)
+    model.partial_fit(X, np.asarray(labels, dtype=int), classes=CLASSES)
+    return model
+
+def iter_training_chunks(data_path, chunksize=2000):
+    """Yield (texts, labels) chunks of the training CSV without loading it all"""
+    import pandas as pd
+    for chunk in pd.read_csv(data_path, chunksize=chunksize):
+        chunk = chunk.fillna('')
+        yield chunk['text'].tolist(), chunk['target'].astype('int').to_numpy()
+
+def _holdout_mask(offset, size, holdout_every):
+    return (np.arange(offset, offset + size) % holdout_every) == 0
+
+def evaluate_online_model(model, vectorizer, data_path, chunksize=2000, holdout_every=5):
+    """Return the accuracy on the held-out rows of the training CSV"""
+    correct = total = offset = 0
+    for texts, labels in iter_training_chunks(data_path, chunksize):
+        holdout = _holdout_mask(offset, len(texts), holdout_every)
+        offset += len(texts)
+        if holdout.any():
+            texts = np.array(texts, dtype=object)
+            predictions = model.predict(vectorizer.transform(texts[holdout]))
+            correct += int(np.sum(predictions == labels[holdout]))
+            total += int(holdout.sum())
+    return correct / total if total else 0.0
+
+def train_online_model(data_path, epochs=5, chunksize=2000, holdout_every=5):
+    """
+    Train the hashing model by streaming the CSV in chunks for several epochs.
+    Every holdout_every-th row is kept out of training for evaluation.
+    Returns (model, vectorizer, accuracy)
+    """
+    vectorizer = make_hashing_vectorizer()
+    model = make_online_model()
+    rng = np.random.default_rng(42)
+
+    for epoch in range(epochs):
+        offset = 0
+        for texts, labels in iter_training_chunks(data_path, chunksize):
+            holdout = _holdout_mask(offset, len(texts), holdout_every)
+            offset += len(texts)
+            order = rng.permutation(np.flatnonzero(~holdout))
+            texts = np.array(texts, dtype=object)
+            update_online_model(model, vectorizer, texts[order], labels[order])
+        accuracy = evaluate_online_model(model, vectorizer, data_path, chunksize, holdout_every)
+        print(f"Epoch {epoch + 1}/{epochs}: holdout accuracy {accuracy:.4f}")
+
+    return model, vectorizer, accuracy
+
+def save_online_model(model, vectorizer, model_path=ONLINE_MODEL_PATH,
+                      vectorizer_path=ONLINE_VECTORIZER_PATH):
+    """Pickle the online model and vectorizer, replacing the files atomically"""
+    for obj, path in ((model, model_path), (vectorizer, vectorizer_path)):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(obj, f)
+        os.replace(tmp_path, path)
+
+def load_online_model(model_path=ONLINE_MODEL_PATH, vectorizer_path=ONLINE_VECTORIZER_PATH):
+    """Load the online model and vectorizer pickles"""
+    with open(model_path, 'rb') as f:
+        model = pickle.load(f)
+    with open(vectorizer_path, 'rb') as f:
+        vectorizer = pickle.load(f)
+    return model, vectorizer
+
+def has_online_model(model_path=ONLINE_MODEL_PATH, vectorizer_path=ONLINE_VECTORIZER_PATH):
+    """Return True if a trained online model is available"""
+    return os.path.exists(model_path) and os.path.exists(vectorizer_path)
+
+def _loaded_bytes(obj):
+    """Python and NumPy heap allocated by loading obj from its pickle"""
+    import tracemalloc
+    data = pickle.dumps(obj)
+    tracemalloc.start()
+    try:
+        loaded = pickle.loads(data)
+        loaded_bytes = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del loaded
+    return loaded_bytes
+
+def _pipeline_footprint(model, vectorizer):
+    # The pickle understates a vocabulary dict's in-memory size several times over
+    footprint = {
+        'pickled_bytes': len(pickle.dumps(model)) + len(pickle.dumps(vectorizer)),
+        'loaded_bytes': _loaded_bytes(model) + _loaded_bytes(vectorizer),
+        'vocabulary_terms': len(getattr(vectorizer, 'vocabulary_', {})),
+    }
+    stop_words = getattr(vectorizer, 'stop_words_', None)
+    if stop_words is not None:
+        footprint['stop_words_terms'] = len(stop_words)
+    return footprint
+
+def _measure(model, vectorizer, test_texts, test_labels, fit_seconds):
+    start = time.perf_counter()
+    predictions = model.predict(vectorizer.transform(test_texts))
+    elapsed = time.perf_counter() - start
+    return {
+        'accuracy': float(np.mean(predictions == np.asarray(test_labels))),
+        'tweets_per_second': len(test_texts) / elapsed if elapsed > 0 else float('inf'),
+        'fit_seconds': fit_seconds,
+        **_pipeline_footprint(model, vectorizer),
+    }
+
+def compare_pipelines(train_texts, train_labels, test_texts, test_labels,
+                      tfidf_model, tfidf_vectorizer, epochs=5, chunksize=2000):
+    """
+    Fit a TF-IDF pipeline (unfitted model and vectorizer) and the hashing
+    pipeline on the same split and report accuracy, memory and throughput.
+    """
+    train_texts = np.array(train_texts, dtype=object)
+    train_labels = np.asarray(train_labels, dtype=int)
+    results = {}
+
+    start = time.perf_counter()
+    X_train = tfidf_vectorizer.fit_transform(train_texts)
+    tfidf_model.fit(X_train, train_labels)
+    results['tfidf_svc'] = _measure(tfidf_model, tfidf_vectorizer, test_texts, test_labels,
+                                    time.perf_counter() - start)
+
+    start = time.perf_counter()
+    vectorizer = make_hashing_vectorizer()
+    model = make_online_model()
+    rng = np.random.default_rng(42)
+    for _ in range(epochs):
+        order = rng.permutation(len(train_texts))
+        for offset in range(0, len(order), chunksize):
+            batch = order[offset:offset + chunksize]
+            update_online_model(model, vectorizer, train_texts[batch], train_labels[batch])
+    results['hashing_sgd'] = _measure(model, vectorizer, test_texts, test_labels,
+                                      time.perf_counter() - start)
+    return results
@@ -0,0 +1,185 @@
+import argparse
+import cProfile
+import io
+import json
+import os
+import pstats
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+PROFILE_LOG_PATH = 'profiling_log.jsonl'
+PROFILE_ENV_VAR = 'CRISIS_ALERT_PROFILE'
+TOP_FUNCTIONS = 25
+
+# The profile of the rerun running on this thread, if profiling is on.
+# Streamlit runs each session's script on its own thread, and background
+# workers never start one, so their queries are not attributed to a rerun.
+_local = threading.local()
+_log_lock = threading.Lock()
+
+class RerunProfile:
+    """Timings of the labelled sections and DB queries of one script rerun"""
+
+    def __init__(self, started=None, use_cprofile=False):
+        self.started = time.perf_counter() if started is None else started
+        self.started_at = datetime.now()
+        self.label = None
+        self.timings = {}
+        self.total_seconds = None
+        self.cprofile = None
+        if use_cprofile:
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+
+    def add(self, kind, name, seconds):
+        entry = self.timings.setdefault((kind, name), [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def finish(self, label=None):
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        self.label = label
+        self.total_seconds = time.perf_counter() - self.started
+
+    def breakdown(self):
+        """Rows of (kind, name, calls, total ms, share of the rerun), slowest first"""
+        total = self.total_seconds or (time.perf_counter() - self.started)
+        rows = [{
+            'Kind': kind,
+            'Name': name,
+            'Calls': calls,
+            'Total ms': round(seconds * 1000, 1),
+            'Share %': round(100 * seconds / total, 1) if total else 0.0,
+        } for (kind, name), (calls, seconds) in self.timings.items()]
+        rows.sort(key=lambda row: row['Total ms'], reverse=True)
+        return rows
+
+    def cprofile_report(self, limit=TOP_FUNCTIONS):
+        """Top functions by cumulative time, or None without cProfile capture"""
+        if self.cprofile is None:
+            return None
+        out = io.StringIO()
+        pstats.Stats(self.cprofile, stream=out).sort_stats('cumulative').print_stats(limit)
+        return out.getvalue()
+
+    def to_record(self):
+        return {
+            'timestamp': self.started_at.isoformat(timespec='seconds'),
+            'label': self.label,
+            'total_ms': round((self.total_seconds or 0) * 1000, 2),
+            'timings': [{'kind': kind, 'name': name, 'calls': calls, 'ms': round(seconds * 1000, 3)}
+                        for (kind, name), (calls, seconds) in self.timings.items()],
+        }
+
+def profiling_requested():
+    """Default for the opt-in switch: set CRISIS_ALERT_PROFILE=1 to start with profiling on"""
+    return os.environ.get(PROFILE_ENV_VAR, '') not in ('', '0')
+
+def current_profile():
+    return getattr(_local, 'profile', None)
+
+def start_rerun(started=None, use_cprofile=False):
+    """Begin profiling the rerun on this thread"""
+    # A rerun cut short by st.rerun() or st.stop() never reached finish_rerun
+    abandoned = current_profile()
+    if abandoned is not None and abandoned.cprofile is not None:
+        abandoned.cprofile.disable()
+    _local.profile = RerunProfile(started, use_cprofile)
+    return _local.profile
+
+def finish_rerun(label=None, log_path=PROFILE_LOG_PATH):
+    """Stop profiling this thread's rerun, append it to the log and return it"""
+    profile = current_profile()
+    if profile is None:
+        return None
+    _local.profile = None
+    profile.finish(label)
+    if log_path:
+        append_sample(profile, log_path)
+    return profile
+
+@contextmanager
+def section(name):
+    """Time a labelled block of the current rerun; free when profiling is off"""
+    profile = current_profile()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add('section', name, time.perf_counter() - start)
+
+def timed_query(func):
+    """Attribute a database function's time to the current rerun"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        profile = current_profile()
+        if profile is None:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.add('query', func.__name__, time.perf_counter() - start)
+    return wrapper
+
+def append_sample(profile, log_path=PROFILE_LOG_PATH):
+    """Append one rerun as a JSON line"""
+    line = json.dumps(profile.to_record())
+    with _log_lock:
+        with open(log_path, 'a') as f:
+            f.write(line + "\n")
+
+def load_samples(log_path=PROFILE_LOG_PATH):
+    samples = []
+    with open(log_path) as f:
+        for line in f:
+            if line.strip():
+                samples.append(json.loads(line))
+    return samples
+
+def summarize(samples):
+    """Per-(kind, name) sample count and median/p95/max milliseconds per rerun"""
+    by_name = {}
+    for sample in samples:
+        by_name.setdefault(('rerun', sample.get('label') or '-'), []).append(sample['total_ms'])
+        for timing in sample['timings']:
+            by_name.setdefault((timing['kind'], timing['name']), []).append(timing['ms'])
+    rows = []
+    for (kind, name), values in by_name.items():
+        values.sort()
+        rows.append({
+            'kind': kind,
+            'name': name,
+            'reruns': len(values),
+            'median_ms': statistics.median(values),
+            'p95_ms': values[min(int(0.95 * len(values)), len(values) - 1)],
+            'max_ms': values[-1],
+        })
+    rows.sort(key=lambda row: row['median_ms'], reverse=True)
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize rerun profiles logged by the app")
+    parser.add_argument('--log', default=PROFILE_LOG_PATH, help="Profiling log (JSON lines)")
+    parser.add_argument('--since', help="Only samples at or after this ISO timestamp")
+    args = parser.parse_args()
+
+    samples = load_samples(args.log)
+    if args.since:
+        samples = [sample for sample in samples if sample['timestamp'] >= args.since]
+    print(f"{len(samples)} reruns in {args.log}")
+    print(f"{'kind':<8}{'name':<32}{'reruns':>7}{'median ms':>11}{'p95 ms':>10}{'max ms':>10}")
+    for row in summarize(samples):
+        print(f"{row['kind']:<8}{row['name']:<32}{row['reruns']:>7}{row['median_ms']:>11.1f}"
+              f"{row['p95_ms']:>10.1f}{row['max_ms']:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import argparse
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import database
+
+ARCHIVE_DB_PATH = "crisis_alerts_archive.db"
+TERMINAL_STATUSES = ('confirmed', 'dismissed')
+MAX_AGE_DAYS = 30
+TERMINAL_AGE_DAYS = 1
+BATCH_SIZE = 500
+RETENTION_INTERVAL_SECONDS = 6 * 60 * 60
+
+_ARCHIVE_TABLE_RE = re.compile(r'^alerts_(\d{4})_(\d{2})$')
+
+_worker_thread = None
+_worker_lock = threading.Lock()
+
+def _archive_table(month):
+    """Return the archive table name for a 'YYYY-MM' month"""
+    if month and re.fullmatch(r'\d{4}-\d{2}', month):
+        return f"alerts_{month.replace('-', '_')}"
+    return "alerts_unknown"
+
+def _connect(archive_path):
+    conn = sqlite3.connect(database.DB_PATH)
+    conn.row_factory = sqlite3.Row
+    conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+    return conn
+
+def _ensure_archive_table(conn, table):
+    conn.execute(f'''
+    CREATE TABLE IF NOT EXISTS archive.{table} (
+        id INTEGER PRIMARY KEY,
+        text TEXT NOT NULL,
+        lat REAL NOT NULL,
+        lon REAL NOT NULL,
+        time TIMESTAMP,
+        status TEXT,
+        archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        model_label INTEGER
+    )
+    ''')
+    # Archive tables created before model_label existed
+    columns = [row[1] for row in conn.execute(f"PRAGMA archive.table_info({table})")]
+    if 'model_label' not in columns:
+        conn.execute(f"ALTER TABLE archive.{table} ADD COLUMN model_label INTEGER")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS archive.idx_{table}_status_time ON {table} (status, time)")
+
+def archive_alerts(max_age_days=MAX_AGE_DAYS, terminal_age_days=TERMINAL_AGE_DAYS,
+                   batch_size=BATCH_SIZE, archive_path=ARCHIVE_DB_PATH):
+    """
+    Move alerts older than max_age_days, or confirmed/dismissed alerts older
+    than terminal_age_days, into per-month tables of the archive database.
+    Each batch is one transaction. Returns the number of alerts moved.
+    """
+    conn = _connect(archive_path)
+    placeholders = ", ".join("?" for _ in TERMINAL_STATUSES)
+    select_sql = f'''
+        SELECT id, substr(time, 1, 7) AS month FROM alerts
+        WHERE julianday(time) < julianday('now', 'localtime', ?)
+           OR (status IN ({placeholders}) AND julianday(time) < julianday('now', 'localtime', ?))
+        ORDER BY id LIMIT ?
+    '''
+    params = (f"-{max_age_days} days", *TERMINAL_STATUSES, f"-{terminal_age_days} days", batch_size)
+
+    moved = 0
+    try:
+        while True:
+            with conn:
+                rows = conn.execute(select_sql, params).fetchall()
+                by_table = {}
+                for row in rows:
+                    by_table.setdefault(_archive_table(row['month']), []).append(row['id'])
+                for table, ids in by_table.items():
+                    _ensure_archive_table(conn, table)
+                    id_list = ", ".join("?" for _ in ids)
+                    conn.execute(
+                        f"INSERT OR REPLACE INTO archive.{table} (id, text, lat, lon, time, status, model_label) "
+                        f"SELECT id, text, lat, lon, time, status, model_label FROM main.alerts WHERE id IN ({id_list})",
+                        ids
+                    )
+                    conn.execute(f"DELETE FROM main.alerts WHERE id IN ({id_list})", ids)
+            moved += len(rows)
+            if len(rows) < batch_size:
+                break
+    finally:
+        conn.close()
+
+    if moved:
+        print(f"Archived {moved} alerts to {archive_path}")
+    return moved
+
+def maintain_database(vacuum_pages=1000, full_vacuum=False, archive_path=ARCHIVE_DB_PATH):
+    """
+    Refresh query planner statistics and reclaim free pages.
+    Incremental vacuum only works once auto_vacuum is INCREMENTAL; full_vacuum
+    switches an existing database over with a one-time VACUUM.
+    """
+    for path in (database.DB_PATH, archive_path):
+        conn = sqlite3.connect(path)
+        try:
+            mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+            if full_vacuum:
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("VACUUM")
+            elif mode == 2:
+                conn.execute(f"PRAGMA incremental_vacuum({int(vacuum_pages)})")
+            conn.execute("ANALYZE")
+            conn.commit()
+        finally:
+            conn.close()
+
+def archive_tables(archive_path=ARCHIVE_DB_PATH):
+    """Return the archive table names, oldest month first"""
+    conn = sqlite3.connect(archive_path)
+    try:
+        names = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'alerts_%'"
+        )]
+    finally:
+        conn.close()
+    return sorted(names)
+
+def _tables_in_range(tables, since, until):
+    selected = []
+    for table in tables:
+        match = _ARCHIVE_TABLE_RE.match(table)
+        if not match:
+            selected.append(table)
+            continue
+        month = f"{match.group(1)}-{match.group(2)}"
+        if since is not None and month < str(since)[:7]:
+            continue
+        if until is not None and month > str(until)[:7]:
+            continue
+        selected.append(table)
+    return selected
+
+def get_alerts(status=None, since=None, until=None, include_archive=False,
+               limit=None, archive_path=ARCHIVE_DB_PATH):
+    """
+    Get alerts filtered by status and time range, newest first. With
+    include_archive, only the archive tables for the months in range are
+    searched as well. Each alert has an 'archived' flag.
+    """
+    conditions = []
+    params = []
+    if status is not None:
+        statuses = [status] if isinstance(status, str) else list(status)
+        conditions.append(f"status IN ({', '.join('?' for _ in statuses)})")
+        params.extend(statuses)
+    if since is not None:
+        conditions.append("julianday(time) >= julianday(?)")
+        params.append(str(since))
+    if until is not None:
+        conditions.append("julianday(time) < julianday(?)")
+        params.append(str(until))
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    selects = [f"SELECT id, text, lat, lon, time, status, model_label, 0 AS archived FROM main.alerts{where}"]
+    all_params = list(params)
+    tables = _tables_in_range(archive_tables(archive_path), since, until) if include_archive else []
+    for table in tables:
+        selects.append(f"SELECT id, text, lat, lon, time, status, model_label, 1 AS archived "
+                       f"FROM archive.{table}{where}")
+        all_params.extend(params)
+
+    sql = " UNION ALL ".join(selects) + " ORDER BY time DESC"
+    if limit is not None:
+        sql += " LIMIT ?"
+        all_params.append(int(limit))
+
+    conn = _connect(archive_path) if include_archive else sqlite3.connect(database.DB_PATH)
+    conn.row_factory = sqlite3.Row
+    try:
+        with conn:
+            for table in tables:
+                _ensure_archive_table(conn, table)
+        alerts = [dict(row) for row in conn.execute(sql, all_params).fetchall()]
+    finally:
+        conn.close()
+    return alerts
+
+def search_archive(query, status=None, since=None, until=None, limit=50,
+                   archive_path=ARCHIVE_DB_PATH):
+    """
+    Find archived alerts whose text contains every word of query, newest
+    first. The archive has no full-text index, so only the month tables in
+    the since/until range are scanned.
+    """
+    words = re.findall(r"\w+", query)
+    if not words or not os.path.exists(archive_path):
+        return []
+    tables = _tables_in_range(archive_tables(archive_path), since, until)
+    if not tables:
+        return []
+
+    conditions = []
+    params = []
+    for word in words:
+        conditions.append("text LIKE ? ESCAPE '\\'")
+        params.append("%" + word.replace('_', '\\_') + "%")
+    if status:
+        statuses = [status] if isinstance(status, str) else list(status)
+        conditions.append(f"status IN ({', '.join('?' for _ in statuses)})")
+        params.extend(statuses)
+    if since is not None:
+        conditions.append("julianday(time) >= julianday(?)")
+        params.append(str(since))
+    if until is not None:
+        conditions.append("julianday(time) < julianday(?)")
+        params.append(str(until))
+    where = " AND ".join(conditions)
+
+    sql = " UNION ALL ".join(
+        f"SELECT id, text, lat, lon, time, status, model_label, 1 AS archived FROM archive.{table} WHERE {where}"
+        for table in tables
+    ) + " ORDER BY time DESC LIMIT ?"
+    conn = _connect(archive_path)
+    try:
+        with conn:
+            for table in tables:
+                _ensure_archive_table(conn, table)
+        alerts = [dict(row) for row in conn.execute(sql, params * len(tables) + [int(limit)]).fetchall()]
+    finally:
+        conn.close()
+    return alerts
+
+def run_retention(max_age_days=MAX_AGE_DAYS, terminal_age_days=TERMINAL_AGE_DAYS):
+    """Archive old alerts, then refresh statistics and reclaim space"""
+    moved = archive_alerts(max_age_days, terminal_age_days)
+    maintain_database()
+    return moved
+
+def _run_worker(interval):
+    while True:
+        try:
+            run_retention()
+        except sqlite3.Error as e:
+            print(f"Retention error: {e}")
+        time.sleep(interval)
+
+def start_retention_worker(interval=RETENTION_INTERVAL_SECONDS):
+    """Start the periodic retention worker once per process"""
+    global _worker_thread
+    with _worker_lock:
+        if _worker_thread is None or not _worker_thread.is_alive():
+            _worker_thread = threading.Thread(target=_run_worker, args=(interval,), daemon=True)
+            _worker_thread.start()
+            print("Retention worker started")
+        return _worker_thread
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive old alerts and maintain the database")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    archive_parser = subparsers.add_parser('archive', help="Move old and reviewed alerts to the archive")
+    archive_parser.add_argument('--max-age-days', type=float, default=MAX_AGE_DAYS)
+    archive_parser.add_argument('--terminal-age-days', type=float, default=TERMINAL_AGE_DAYS,
+                                help="Age after which confirmed/dismissed alerts are archived")
+    archive_parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    maintain_parser = subparsers.add_parser('maintain', help="Run ANALYZE and incremental VACUUM")
+    maintain_parser.add_argument('--pages', type=int, default=1000, help="Free pages to reclaim")
+    maintain_parser.add_argument('--full-vacuum', action='store_true',
+                                 help="One-time VACUUM that enables incremental vacuum on existing databases")
+
+    subparsers.add_parser('stats', help="Show hot and archived alert counts")
+    args = parser.parse_args()
+
+    if args.command == 'archive':
+        start = time.perf_counter()
+        moved = archive_alerts(args.max_age_days, args.terminal_age_days, args.batch_size)
+        print(f"Moved {moved} alerts in {time.perf_counter() - start:.2f}s")
+    elif args.command == 'maintain':
+        maintain_database(args.pages, args.full_vacuum)
+        print("Maintenance complete")
+    else:
+        conn = _connect(ARCHIVE_DB_PATH)
+        try:
+            print(f"alerts (hot): {conn.execute('SELECT COUNT(*) FROM main.alerts').fetchone()[0]}")
+            for table in archive_tables():
+                print(f"{table}: {conn.execute(f'SELECT COUNT(*) FROM archive.{table}').fetchone()[0]}")
+        finally:
+            conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import argparse
+import ast
+import json
+import subprocess
+import sys
+
+# Modules app.py now imports only inside the tabs and actions that need them
+HEAVY_MODULES = [
+    'pandas',
+    'numpy',
+    'sklearn',
+    'tweepy',
+    'twilio.rest',
+    'opencage.geocoder',
+    'geopy.geocoders',
+]
+
+def app_top_level_imports(app_path='app.py'):
+    """Modules app.py imports at module level, i.e. on every script run"""
+    with open(app_path) as f:
+        tree = ast.parse(f.read(), app_path)
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            names = [node.module]
+        else:
+            continue
+        modules.extend(name for name in names if name not in modules)
+    return modules
+
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def measure_import(modules):
+    """Import modules in a fresh interpreter; returns (seconds, heavy modules loaded)"""
+    code = _IMPORT_PROBE.format(modules=list(modules), heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    result = json.loads(output.stdout.strip().splitlines()[-1])
+    return result['seconds'], result['loaded']
+
+_RENDER_PROBE = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({app_path!r}, default_timeout=120)
+start = time.perf_counter()
+app.run()
+first = time.perf_counter() - start
+loaded = [m for m in {heavy!r} if m in sys.modules]
+reruns = []
+for _ in range({reruns!r}):
+    start = time.perf_counter()
+    app.run()
+    reruns.append(time.perf_counter() - start)
+print(json.dumps({{'first': first, 'reruns': reruns, 'loaded': loaded}}))
+"""
+
+def measure_render(app_path='app.py', reruns=3):
+    """
+    Time the first render and warm reruns of the app with Streamlit's AppTest
+    in a fresh interpreter. Returns (first, rerun_times, heavy modules loaded
+    by the first render)
+    """
+    code = _RENDER_PROBE.format(app_path=app_path, heavy=HEAVY_MODULES, reruns=reruns)
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    result = json.loads(output.stdout.strip().splitlines()[-1])
+    return result['first'], result['reruns'], result['loaded']
+
+def main():
+    parser = argparse.ArgumentParser(description="Report app import time and first-render time")
+    parser.add_argument('--skip-render', action='store_true', help="Only measure imports")
+    args = parser.parse_args()
+
+    print("Import time per heavy dependency (fresh interpreter):")
+    eager_total = 0.0
+    for module in HEAVY_MODULES:
+        try:
+            seconds, _ = measure_import([module])
+        except subprocess.CalledProcessError:
+            print(f"  {module:<20} not installed")
+            continue
+        eager_total += seconds
+        print(f"  {module:<20} {seconds * 1000:8.0f} ms")
+
+    seconds, loaded = measure_import(app_top_level_imports())
+    print(f"\nApp top-level imports: {seconds * 1000:.0f} ms")
+    print(f"Heavy modules loaded by imports: {', '.join(loaded) or 'none'}")
+    print(f"Sum of heavy imports if loaded eagerly: {eager_total * 1000:.0f} ms")
+
+    if not args.skip_render:
+        first, reruns, loaded = measure_render()
+        print(f"\nFirst render (Dashboard): {first * 1000:.0f} ms")
+        # Includes what the page itself pulls in, e.g. pandas for the alert map
+        print(f"Heavy modules loaded by the first render: {', '.join(loaded) or 'none'}")
+        print(f"Warm reruns: {', '.join(f'{r * 1000:.0f} ms' for r in reruns)}")
+
+if __name__ == "__main__":
+    main()
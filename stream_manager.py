@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+RATE_WINDOW_SECONDS = 60
+
+class StreamStats:
+    """Thread-safe counters and a sliding-window tweet rate for the stream"""
+
+    def __init__(self, window_seconds=RATE_WINDOW_SECONDS):
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._recent = deque()
+        self.tweets_seen = 0
+        self.keyword_matches = 0
+        self.alerts_inserted = 0
+        self.errors = 0
+        self.model_errors = 0
+        self.reconnects = 0
+        self.last_tweet_at = None
+        self.last_error = None
+
+    def _trim(self, now):
+        while self._recent and now - self._recent[0] > self.window_seconds:
+            self._recent.popleft()
+
+    def record_tweet(self):
+        now = time.monotonic()
+        with self._lock:
+            self.tweets_seen += 1
+            self.last_tweet_at = datetime.now()
+            self._recent.append(now)
+            self._trim(now)
+
+    def record_match(self):
+        with self._lock:
+            self.keyword_matches += 1
+
+    def record_alert(self):
+        with self._lock:
+            self.alerts_inserted += 1
+
+    def record_error(self, error):
+        with self._lock:
+            self.errors += 1
+            self.last_error = str(error)
+
+    def record_model_error(self):
+        with self._lock:
+            self.model_errors += 1
+
+    def record_reconnect(self):
+        with self._lock:
+            self.reconnects += 1
+
+    def snapshot(self):
+        """Return the current counters as a dict"""
+        with self._lock:
+            self._trim(time.monotonic())
+            return {
+                'tweets_seen': self.tweets_seen,
+                'keyword_matches': self.keyword_matches,
+                'alerts_inserted': self.alerts_inserted,
+                'errors': self.errors,
+                'model_errors': self.model_errors,
+                'reconnects': self.reconnects,
+                'tweets_per_minute': len(self._recent) * 60.0 / self.window_seconds,
+                'last_tweet_at': self.last_tweet_at,
+                'last_error': self.last_error,
+            }
+
+class StreamSupervisor:
+    """Owns the single Twitter stream worker shared by every browser session"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop_event = None
+        self.stats = StreamStats()
+        self.started_at = None
+
+    def is_running(self):
+        """Return True if the stream worker thread is alive"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the stream worker; returns False if it is already running"""
+        from twitter_stream import create_twitter_stream_thread
+
+        with self._lock:
+            if self.is_running():
+                return False
+            self.stats = StreamStats()
+            self._thread, self._stop_event = create_twitter_stream_thread(self.stats)
+            self._thread.start()
+            self.started_at = datetime.now()
+            print("Twitter stream worker started")
+            return True
+
+    def stop(self, timeout=10):
+        """Signal the stream worker to stop and wait for it; returns False if it was not running"""
+        with self._lock:
+            if not self.is_running():
+                return False
+            self._stop_event.set()
+            thread = self._thread
+        thread.join(timeout)
+        if thread.is_alive():
+            print("Twitter stream worker did not stop within the timeout")
+        else:
+            print("Twitter stream worker stopped")
+        return True
+
+    def status(self):
+        """Return running state, start time and live stats"""
+        status = self.stats.snapshot()
+        status['running'] = self.is_running()
+        status['started_at'] = self.started_at
+        return status
+
+_supervisor = None
+_supervisor_lock = threading.Lock()
+
+def get_stream_supervisor():
+    """Return the process-wide stream supervisor"""
+    global _supervisor
+    with _supervisor_lock:
+        if _supervisor is None:
+            _supervisor = StreamSupervisor()
+        return _supervisor
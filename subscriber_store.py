@@ -0,0 +1,146 @@
+import sqlite3
+import threading
+import time
+
+import database
+from utils import haversine_distances
+
+INITIAL_CAPACITY = 1024
+PHONE_QUERY_CHUNK = 500
+
+class SubscriberStore:
+    """
+    Columnar in-memory snapshot of the subscriptions table: ids, coordinates
+    and radii in contiguous NumPy arrays. Phones stay in SQLite and are
+    fetched only for matched subscribers. refresh() loads rows past the
+    highest id seen so far and falls back to a full reload when rows were
+    deleted or the database path changed.
+    """
+
+    def __init__(self, initial_capacity=INITIAL_CAPACITY):
+        self._lock = threading.Lock()
+        # NumPy is imported on first use so importing notification stays light
+        self._allocate(initial_capacity)
+        self.size = 0
+        self.high_water = 0
+        self.db_path = None
+        self.full_reloads = 0
+        self.last_refresh_seconds = 0.0
+        self.last_refresh_rows = 0
+
+    def _allocate(self, capacity):
+        import numpy as np
+        self.ids = np.empty(capacity, dtype=np.int64)
+        self.lats = np.empty(capacity, dtype=np.float64)
+        self.lons = np.empty(capacity, dtype=np.float64)
+        self.radii = np.empty(capacity, dtype=np.float64)
+
+    def _append(self, rows):
+        import numpy as np
+        needed = self.size + len(rows)
+        if needed > len(self.ids):
+            capacity = len(self.ids)
+            while capacity < needed:
+                capacity *= 2
+            old = (self.ids, self.lats, self.lons, self.radii)
+            self._allocate(capacity)
+            for new_array, old_array in zip((self.ids, self.lats, self.lons, self.radii), old):
+                new_array[:self.size] = old_array[:self.size]
+        block = np.array(rows, dtype=np.float64).reshape(-1, 4)
+        end = self.size + len(rows)
+        self.ids[self.size:end] = block[:, 0].astype(np.int64)
+        self.lats[self.size:end] = block[:, 1]
+        self.lons[self.size:end] = block[:, 2]
+        self.radii[self.size:end] = block[:, 3]
+        self.size = end
+        self.high_water = int(self.ids[end - 1])
+
+    def refresh(self):
+        """Bring the snapshot up to date; returns the number of rows loaded"""
+        start = time.perf_counter()
+        with self._lock:
+            conn = sqlite3.connect(database.DB_PATH)
+            try:
+                cursor = conn.cursor()
+                full = self.db_path != database.DB_PATH
+                if not full:
+                    # Rows at or below the high-water mark only change by deletion
+                    cursor.execute("SELECT COUNT(*) FROM subscriptions WHERE id <= ?", (self.high_water,))
+                    full = cursor.fetchone()[0] != self.size
+                if full:
+                    self.size = 0
+                    self.high_water = 0
+                    self.db_path = database.DB_PATH
+                    self.full_reloads += 1
+                cursor.execute(
+                    "SELECT id, lat, lon, radius FROM subscriptions WHERE id > ? ORDER BY id",
+                    (self.high_water,)
+                )
+                rows = cursor.fetchall()
+            finally:
+                conn.close()
+            if rows:
+                self._append(rows)
+            self.last_refresh_rows = len(rows)
+            self.last_refresh_seconds = time.perf_counter() - start
+            return len(rows)
+
+    def find_in_radius(self, lat, lon):
+        """
+        Return (ids, distances_km) of subscribers whose radius covers the point,
+        in subscription order
+        """
+        with self._lock:
+            n = self.size
+            ids, lats, lons, radii = self.ids[:n], self.lats[:n], self.lons[:n], self.radii[:n]
+            distances = haversine_distances(lat, lon, lats, lons)
+            mask = distances <= radii
+            return ids[mask].copy(), distances[mask]
+
+    def get_phones(self, ids):
+        """Fetch phone numbers for the given subscriber ids as {id: phone}"""
+        ids = [int(i) for i in ids]
+        phones = {}
+        conn = sqlite3.connect(database.DB_PATH)
+        try:
+            for offset in range(0, len(ids), PHONE_QUERY_CHUNK):
+                chunk = ids[offset:offset + PHONE_QUERY_CHUNK]
+                placeholders = ", ".join("?" for _ in chunk)
+                phones.update(conn.execute(
+                    f"SELECT id, phone FROM subscriptions WHERE id IN ({placeholders})", chunk
+                ).fetchall())
+        finally:
+            conn.close()
+        return phones
+
+    def stats(self):
+        """Report snapshot size, memory per subscriber and the last refresh cost"""
+        with self._lock:
+            allocated = self.ids.nbytes + self.lats.nbytes + self.lons.nbytes + self.radii.nbytes
+            used = self.size * (self.ids.itemsize + self.lats.itemsize + self.lons.itemsize + self.radii.itemsize)
+            return {
+                'subscribers': self.size,
+                'high_water': self.high_water,
+                'allocated_bytes': allocated,
+                'bytes_per_subscriber': used / self.size if self.size else 0,
+                'last_refresh_rows': self.last_refresh_rows,
+                'last_refresh_seconds': self.last_refresh_seconds,
+                'full_reloads': self.full_reloads,
+            }
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_subscriber_store():
+    """Return the process-wide subscriber store"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SubscriberStore()
+        return _store
+
+if __name__ == "__main__":
+    store = get_subscriber_store()
+    store.refresh()
+    for name, value in store.stats().items():
+        print(f"{name}: {value}")
@@ -1,41 +1,271 @@
-import pandas as pd
-import streamlit as st
+import argparse
+import glob
+import hashlib
+import json
+import os
 import pickle
-from sklearn.feature_extraction.text import TfidfVectorizer
+import shutil
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
 from sklearn.svm import SVC
-from sklearn.model_selection import train_test_split
-from sklearn.impute import SimpleImputer
+from sklearn.model_selection import GridSearchCV, train_test_split
+from model_artifact import ARTIFACT_DIR, export_artifact
+from model_store import ACTIVE_ONLINE, ACTIVE_TFIDF, set_active_model
+from online_model import compare_pipelines, save_online_model, train_online_model
+from text_processing import PIPELINE_VERSION, make_tfidf_vectorizer
+
+DATA_PATH = './tweets.csv'
+CACHE_DIR = './feature_cache'
+MODELS_DIR = './models'
+MODEL_PATH = 'model.pkl'
+VECTORIZER_PATH = 'vectorizer.pkl'
+
+PARAM_GRID = {
+    'kernel': ['linear', 'rbf'],
+    'C': [0.5, 1.0, 2.0, 5.0],
+}
+
+def data_hash(path):
+    """Return the SHA-256 hex digest of a data file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_training_data(path=DATA_PATH):
+    """Load the tweets CSV with missing values replaced by empty strings"""
+    train_data = pd.read_csv(path)
+    return train_data.fillna('')
+
+def make_vectorizer():
+    """Create the vectorizer used for training"""
+    return make_tfidf_vectorizer()
+
+def _param_repr(value):
+    # Functions by name, not by their per-process address
+    if callable(value):
+        return f"{value.__module__}.{value.__qualname__}"
+    return str(value)
+
+def _feature_cache_key(digest, vectorizer):
+    params = json.dumps(vectorizer.get_params(), sort_keys=True, default=_param_repr)
+    key = f"{digest}{params}text-v{PIPELINE_VERSION}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+
+def build_features(train_data, digest, cache_dir=CACHE_DIR):
+    """
+    Vectorize the training texts, reusing the on-disk cache when the data
+    and vectorizer parameters are unchanged.
+    Returns (X, y, vectorizer, cache_hit)
+    """
+    vectorizer = make_vectorizer()
+    key = _feature_cache_key(digest, vectorizer)
+    matrix_path = os.path.join(cache_dir, f"{key}.npz")
+    labels_path = os.path.join(cache_dir, f"{key}.labels.npy")
+    vectorizer_path = os.path.join(cache_dir, f"{key}.vectorizer.pkl")
+
+    if all(os.path.exists(p) for p in (matrix_path, labels_path, vectorizer_path)):
+        print(f"Loading cached features {key}")
+        X = sp.load_npz(matrix_path)
+        y = np.load(labels_path)
+        with open(vectorizer_path, 'rb') as f:
+            vectorizer = pickle.load(f)
+        return X, y, vectorizer, True
+
+    print(f"Vectorizing {len(train_data)} tweets")
+    X = vectorizer.fit_transform(train_data['text'])
+    y = train_data['target'].astype('int').to_numpy()
+
+    os.makedirs(cache_dir, exist_ok=True)
+    sp.save_npz(matrix_path, X.tocsr(), compressed=False)
+    np.save(labels_path, y)
+    with open(vectorizer_path, 'wb') as f:
+        pickle.dump(vectorizer, f)
+    print(f"Cached features as {key}")
+    return X, y, vectorizer, False
+
+def search_hyperparameters(X_train, y_train, param_grid=PARAM_GRID, cv=3, n_jobs=-1):
+    """Run a cross-validated grid search over SVC parameters in parallel"""
+    search = GridSearchCV(SVC(), param_grid, cv=cv, n_jobs=n_jobs, refit=True)
+    search.fit(X_train, y_train)
+    return search.best_estimator_, search.best_params_, float(search.best_score_)
+
+def latest_artifact(models_dir=MODELS_DIR):
+    """Return the metrics of the most recent versioned artifact, or None"""
+    paths = sorted(glob.glob(os.path.join(models_dir, '*', 'metrics.json')))
+    if not paths:
+        return None
+    with open(paths[-1]) as f:
+        return json.load(f)
+
+def save_artifacts(clf, vectorizer, metrics, models_dir=MODELS_DIR, install=True):
+    """
+    Write the model, vectorizer, compact artifact and metrics to a new
+    versioned directory. When install is set, also copy the model files to
+    the paths the app loads.
+    """
+    version = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{metrics['data_hash'][:8]}"
+    version_dir = os.path.join(models_dir, version)
+    os.makedirs(version_dir, exist_ok=True)
+
+    model_path = os.path.join(version_dir, MODEL_PATH)
+    vectorizer_path = os.path.join(version_dir, VECTORIZER_PATH)
+    with open(model_path, 'wb') as f:
+        pickle.dump(clf, f)
+    with open(vectorizer_path, 'wb') as f:
+        pickle.dump(vectorizer, f)
+
+    try:
+        export_artifact(clf, vectorizer, os.path.join(version_dir, ARTIFACT_DIR))
+        has_artifact = True
+    except ValueError as e:
+        print(f"Skipping compact artifact export: {e}")
+        has_artifact = False
+
+    metrics['version'] = version
+    with open(os.path.join(version_dir, 'metrics.json'), 'w') as f:
+        json.dump(metrics, f, indent=2)
+
+    if install:
+        shutil.copyfile(model_path, MODEL_PATH)
+        shutil.copyfile(vectorizer_path, VECTORIZER_PATH)
+        if has_artifact:
+            export_artifact(clf, vectorizer, ARTIFACT_DIR)
+        elif os.path.isdir(ARTIFACT_DIR):
+            # The app prefers the artifact over the pickles; drop the previous model's
+            shutil.rmtree(ARTIFACT_DIR)
+            print(f"Removed stale {ARTIFACT_DIR}/ from a previous install")
+        set_active_model(ACTIVE_TFIDF, version)
+        print(f"Installed model version {version}")
+    return version_dir
+
+def train_model(data_path=DATA_PATH, cache_dir=CACHE_DIR, models_dir=MODELS_DIR,
+                cv=3, n_jobs=-1, reuse_params=False, install=True):
+    timings = {}
+    start = time.perf_counter()
 
-def train_model():
     # Load and prepare training data
-    train_data = pd.read_csv('./tweets.csv')
-    
-    # Handle missing values
-    imputer = SimpleImputer(strategy='constant', fill_value='')
-    train_data = pd.DataFrame(imputer.fit_transform(train_data), columns=train_data.columns)
-    
+    digest = data_hash(data_path)
+    train_data = load_training_data(data_path)
+    timings['load'] = time.perf_counter() - start
+
     # Feature extraction
-    vectorizer = TfidfVectorizer()
-    X = vectorizer.fit_transform(train_data['text'])
-    Y = train_data['target']
-    
+    step = time.perf_counter()
+    X, y, vectorizer, cache_hit = build_features(train_data, digest, cache_dir)
+    timings['features'] = time.perf_counter() - step
+
     # Train-test split
     X_train, X_test, Y_train, Y_test = train_test_split(
-        X, Y, test_size=0.2, random_state=42
+        X, y, test_size=0.2, random_state=42
     )
-    
+
     # Model training
-    clf = SVC()
-    clf.fit(X_train, Y_train.astype('int'))
-    
+    step = time.perf_counter()
+    previous = latest_artifact(models_dir) if reuse_params else None
+    if previous is not None:
+        print(f"Reusing parameters from version {previous['version']}: {previous['best_params']}")
+        best_params = previous['best_params']
+        cv_score = None
+        clf = SVC(**best_params)
+        clf.fit(X_train, Y_train)
+    else:
+        clf, best_params, cv_score = search_hyperparameters(X_train, Y_train, cv=cv, n_jobs=n_jobs)
+    timings['fit'] = time.perf_counter() - step
+
     # Evaluate model
-    accuracy = clf.score(X_test, Y_test.astype('int'))
+    accuracy = clf.score(X_test, Y_test)
+    timings['total'] = time.perf_counter() - start
+    print(f"Best parameters: {best_params}")
     print(f"Model Accuracy: {accuracy:.4f}")
-    
+
+    metrics = {
+        'data_hash': digest,
+        'n_samples': int(X.shape[0]),
+        'n_features': int(X.shape[1]),
+        'feature_cache_hit': cache_hit,
+        'best_params': best_params,
+        'cv_score': cv_score,
+        'test_accuracy': float(accuracy),
+        'timings_seconds': {name: round(value, 3) for name, value in timings.items()},
+    }
+
     print("Saving Model")
-    pickle.dump(clf, open('model.pkl', 'wb'))
-    pickle.dump(vectorizer, open('vectorizer.pkl', 'wb'))
-    print("Model saved successfully!")
+    version_dir = save_artifacts(clf, vectorizer, metrics, models_dir, install=install)
+    print(f"Model saved successfully to {version_dir}")
+    return metrics
+
+def train_hashing_model(data_path=DATA_PATH, epochs=5, install=True):
+    """Train the bounded-memory hashing model by streaming the CSV in chunks"""
+    start = time.perf_counter()
+    model, vectorizer, accuracy = train_online_model(data_path, epochs=epochs)
+    print(f"Model Accuracy: {accuracy:.4f} ({time.perf_counter() - start:.1f}s)")
+    if install:
+        save_online_model(model, vectorizer)
+        set_active_model(ACTIVE_ONLINE)
+        print("Online model saved successfully!")
+    return accuracy
+
+def compare_models(data_path=DATA_PATH, models_dir=MODELS_DIR):
+    """Benchmark the TF-IDF + SVC pipeline against the hashing + SGD pipeline"""
+    train_data = load_training_data(data_path)
+    texts = train_data['text'].tolist()
+    labels = train_data['target'].astype('int').to_numpy()
+    train_texts, test_texts, train_labels, test_labels = train_test_split(
+        texts, labels, test_size=0.2, random_state=42
+    )
+
+    previous = latest_artifact(models_dir)
+    svc_params = previous['best_params'] if previous else {}
+    results = compare_pipelines(train_texts, train_labels, test_texts, test_labels,
+                                SVC(**svc_params), make_vectorizer())
+
+    print(f"{'pipeline':<12} {'accuracy':>8} {'fit s':>8} {'tweets/s':>10} "
+          f"{'pickled KB':>11} {'in-memory KB':>13} {'vocab':>7}")
+    for name, row in results.items():
+        print(f"{name:<12} {row['accuracy']:>8.4f} {row['fit_seconds']:>8.2f} "
+              f"{row['tweets_per_second']:>10.0f} {row['pickled_bytes'] / 1024:>11.0f} "
+              f"{row['loaded_bytes'] / 1024:>13.0f} {row['vocabulary_terms']:>7}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the disaster tweet classifier")
+    parser.add_argument('--data', default=DATA_PATH, help="Training CSV path")
+    parser.add_argument('--mode', choices=['tfidf', 'hashing'], default='tfidf',
+                        help="tfidf trains TF-IDF + SVC; hashing trains HashingVectorizer + SGD incrementally")
+    parser.add_argument('--epochs', type=int, default=5, help="Passes over the data in hashing mode")
+    parser.add_argument('--compare', action='store_true',
+                        help="Benchmark both pipelines for accuracy, memory and throughput and exit")
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help="Directory for cached feature matrices")
+    parser.add_argument('--models-dir', default=MODELS_DIR, help="Directory for versioned model artifacts")
+    parser.add_argument('--cv', type=int, default=3, help="Cross-validation folds for the search")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="Parallel jobs for the search (-1 uses all cores)")
+    parser.add_argument('--reuse-params', action='store_true',
+                        help="Skip the search and refit with the latest artifact's best parameters")
+    parser.add_argument('--no-install', action='store_true',
+                        help="Do not install the new model where the app loads it")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare_models(args.data, args.models_dir)
+        return
+    if args.mode == 'hashing':
+        train_hashing_model(args.data, epochs=args.epochs, install=not args.no_install)
+        return
+
+    train_model(
+        data_path=args.data,
+        cache_dir=args.cache_dir,
+        models_dir=args.models_dir,
+        cv=args.cv,
+        n_jobs=args.n_jobs,
+        reuse_params=args.reuse_params,
+        install=not args.no_install,
+    )
 
-if "__name__" == "__main__":
-    train_model()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
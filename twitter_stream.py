@@ -1,33 +1,71 @@
 import tweepy
 import threading
 import json
-import time
+import random
 import streamlit as st
 from database import insert_alert
+from model_store import predict_text
+from burst_detector import get_burst_detector
+from text_processing import normalize_text
 from utils import get_crisis_keywords
 
+RECONNECT_BASE_SECONDS = 1
+RECONNECT_MAX_SECONDS = 60
+
+def reconnect_delay(attempt, base=RECONNECT_BASE_SECONDS, cap=RECONNECT_MAX_SECONDS):
+    """Exponential backoff with full jitter for the given reconnect attempt"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
 class CrisisStream(tweepy.StreamingClient):
-    def __init__(self, bearer_token):
+    def __init__(self, bearer_token, stop_event=None, stats=None):
         super().__init__(bearer_token)
         self.crisis_keywords = get_crisis_keywords()
+        self.stop_event = stop_event or threading.Event()
+        self.stats = stats
+        self.reconnect_attempts = 0
+        
+    def on_connect(self):
+        self.reconnect_attempts = 0
+        print("Twitter stream connected")
         
     def on_tweet(self, tweet):
         """Process incoming tweets with location data"""
+        if self.stats:
+            self.stats.record_tweet()
         # Check if we have geo data
         if tweet.geo:
-            text = tweet.text.lower()
+            # Cached: retweets repeat the same text many times during an event
+            text = normalize_text(tweet.text)
             
             # Check if tweet contains crisis keywords
-            if any(keyword in text for keyword in self.crisis_keywords):
+            matched_keywords = [keyword for keyword in self.crisis_keywords if keyword in text]
+            if matched_keywords:
+                if self.stats:
+                    self.stats.record_match()
                 try:
                     # Extract coordinates if available
                     if tweet.geo.get('coordinates') and tweet.geo['coordinates'].get('coordinates'):
                         lon, lat = tweet.geo['coordinates']['coordinates']
+                        # Every keyword match counts towards burst detection for its region
+                        get_burst_detector().observe(lat, lon, matched_keywords)
+                        # Every match is queued for review; the model's label only
+                        # ranks it, so operators can still correct false negatives
+                        try:
+                            model_label = predict_text(tweet.text)
+                        except Exception as e:
+                            model_label = None
+                            print(f"Model could not classify tweet: {e}")
+                            if self.stats:
+                                self.stats.record_model_error()
                         # Store as a potential alert in the database
-                        insert_alert(tweet.text, lat, lon)
-                        print(f"Potential crisis detected: {tweet.text[:50]}... at {lat}, {lon}")
+                        insert_alert(tweet.text, lat, lon, model_label)
+                        if self.stats:
+                            self.stats.record_alert()
+                        print(f"Potential crisis detected: {tweet.text[:50]}... at {lat}, {lon} (model: {model_label})")
                 except Exception as e:
                     print(f"Error processing tweet: {e}")
+                    if self.stats:
+                        self.stats.record_error(e)
     
     def on_error(self, status):
         print(f"Error: {status}")
@@ -35,18 +73,24 @@ class CrisisStream(tweepy.StreamingClient):
             return False  # Stop the stream
 
     def on_connection_error(self):
-        print("Twitter API connection error, reconnecting...")
-        time.sleep(60)  # Wait before reconnecting
+        delay = reconnect_delay(self.reconnect_attempts)
+        self.reconnect_attempts += 1
+        if self.stats:
+            self.stats.record_reconnect()
+        print(f"Twitter API connection error, reconnecting in {delay:.1f}s...")
+        # Wait on the stop event so a stop request interrupts the backoff
+        if self.stop_event.wait(delay):
+            self.disconnect()
 
 
-def start_twitter_stream(stop_event):
-    """Start Twitter stream in a background thread"""
+def start_twitter_stream(stop_event, stats=None):
+    """Run the Twitter stream until stop_event is set"""
     try:
         # Get Twitter API credentials from Streamlit secrets
         bearer_token = st.secrets["twitter"]["bearer_token"]
         
         # Initialize the stream
-        stream = CrisisStream(bearer_token)
+        stream = CrisisStream(bearer_token, stop_event=stop_event, stats=stats)
         
         # Add rules for filtering tweets with crisis keywords and geo data
         # Delete existing rules
@@ -59,25 +103,28 @@ def start_twitter_stream(stop_event):
         keywords = " OR ".join(get_crisis_keywords())
         stream.add_rules(tweepy.StreamRule(f"({keywords}) has:geo"))
         
-        # Start filtering
-        stream.filter(tweet_fields=["geo"], expansions=["geo.place_id"])
+        # Start filtering on tweepy's own thread so this one can watch the stop event
+        filter_thread = stream.filter(tweet_fields=["geo"], expansions=["geo.place_id"], threaded=True)
         
-        # Keep running until stop event is set
-        while not stop_event.is_set():
-            time.sleep(1)
+        # Keep running until stop event is set or the stream gives up
+        while not stop_event.is_set() and filter_thread.is_alive():
+            stop_event.wait(1)
         
         # Disconnect when stop event is set
         stream.disconnect()
+        filter_thread.join(timeout=5)
         
     except Exception as e:
         print(f"Twitter streaming error: {e}")
+        if stats:
+            stats.record_error(e)
 
-def create_twitter_stream_thread():
+def create_twitter_stream_thread(stats=None):
     """Create and return a thread for Twitter streaming with a stop event"""
     stop_event = threading.Event()
     thread = threading.Thread(
         target=start_twitter_stream, 
-        args=(stop_event,),
+        args=(stop_event, stats),
         daemon=True
     )
     return thread, stop_event
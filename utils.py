@@ -1,6 +1,4 @@
 import math
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut, GeocoderServiceError
 
 def haversine_distance(lat1, lon1, lat2, lon2):
     """
@@ -18,11 +16,29 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     r = 6371  # Radius of earth in kilometers
     return c * r
 
+def haversine_distances(lat, lon, lats, lons):
+    """
+    Vectorized haversine: distances in km from one point to arrays of points
+    """
+    import numpy as np
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2 = np.radians(lats)
+    lon2 = np.radians(lons)
+
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+    a = np.sin(dlat/2)**2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlon/2)**2
+    c = 2 * np.arcsin(np.sqrt(a))
+    r = 6371  # Radius of earth in kilometers
+    return c * r
+
 def geocode_address(address):
     """
     Convert an address string to latitude and longitude
     Returns a tuple (lat, lon) or None if geocoding fails
     """
+    from geopy.geocoders import Nominatim
+    from geopy.exc import GeocoderTimedOut, GeocoderServiceError
     geolocator = Nominatim(user_agent="crisis_alert_app")
     try:
         location = geolocator.geocode(address)